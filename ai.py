@@ -1,95 +1,50 @@
+import multiprocessing
 import random
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from bitboard import BitBoard
+from board import Board
+from evaluation import PIECE_VALUES
+from time_manager import TimeManager, SearchTimeout
+from transposition import TranspositionTable, SharedTranspositionTable, TT_SIZE_MB, EXACT, LOWER_BOUND, UPPER_BOUND
 
-PIECE_VALUES = {
-    'Pawn': 1,
-    'Knight': 3,
-    'Bishop': 3,
-    'Rook': 5,
-    'Queen': 9,
-    'King': 100
-}
-
-# Piece-Square Tables for positional evaluation
-PAWN_TABLE = [
-    [0,  0,  0,  0,  0,  0,  0,  0],
-    [50, 50, 50, 50, 50, 50, 50, 50],
-    [10, 10, 20, 30, 30, 20, 10, 10],
-    [5,  5, 10, 25, 25, 10,  5,  5],
-    [0,  0,  0, 20, 20,  0,  0,  0],
-    [5, -5,-10,  0,  0,-10, -5,  5],
-    [5, 10, 10,-20,-20, 10, 10,  5],
-    [0,  0,  0,  0,  0,  0,  0,  0]
-]
-
-KNIGHT_TABLE = [
-    [-50,-40,-30,-30,-30,-30,-40,-50],
-    [-40,-20,  0,  0,  0,  0,-20,-40],
-    [-30,  0, 10, 15, 15, 10,  0,-30],
-    [-30,  5, 15, 20, 20, 15,  5,-30],
-    [-30,  0, 15, 20, 20, 15,  0,-30],
-    [-30,  5, 10, 15, 15, 10,  5,-30],
-    [-40,-20,  0,  5,  5,  0,-20,-40],
-    [-50,-40,-30,-30,-30,-30,-40,-50]
-]
-
-BISHOP_TABLE = [
-    [-20,-10,-10,-10,-10,-10,-10,-20],
-    [-10,  0,  0,  0,  0,  0,  0,-10],
-    [-10,  0,  5, 10, 10,  5,  0,-10],
-    [-10,  5,  5, 10, 10,  5,  5,-10],
-    [-10,  0, 10, 10, 10, 10,  0,-10],
-    [-10, 10, 10, 10, 10, 10, 10,-10],
-    [-10,  5,  0,  0,  0,  0,  5,-10],
-    [-20,-10,-10,-10,-10,-10,-10,-20]
-]
-
-ROOK_TABLE = [
-    [0,  0,  0,  0,  0,  0,  0,  0],
-    [5, 10, 10, 10, 10, 10, 10,  5],
-    [-5,  0,  0,  0,  0,  0,  0, -5],
-    [-5,  0,  0,  0,  0,  0,  0, -5],
-    [-5,  0,  0,  0,  0,  0,  0, -5],
-    [-5,  0,  0,  0,  0,  0,  0, -5],
-    [-5,  0,  0,  0,  0,  0,  0, -5],
-    [0,  0,  0,  5,  5,  0,  0,  0]
-]
-
-QUEEN_TABLE = [
-    [-20,-10,-10, -5, -5,-10,-10,-20],
-    [-10,  0,  0,  0,  0,  0,  0,-10],
-    [-10,  0,  5,  5,  5,  5,  0,-10],
-    [-5,  0,  5,  5,  5,  5,  0, -5],
-    [0,  0,  5,  5,  5,  5,  0, -5],
-    [-10,  5,  5,  5,  5,  5,  0,-10],
-    [-10,  0,  5,  0,  0,  0,  0,-10],
-    [-20,-10,-10, -5, -5,-10,-10,-20]
-]
-
-KING_TABLE = [
-    [-30,-40,-40,-50,-50,-40,-40,-30],
-    [-30,-40,-40,-50,-50,-40,-40,-30],
-    [-30,-40,-40,-50,-50,-40,-40,-30],
-    [-30,-40,-40,-50,-50,-40,-40,-30],
-    [-20,-30,-30,-40,-40,-30,-30,-20],
-    [-10,-20,-20,-20,-20,-20,-20,-10],
-    [20, 20,  0,  0,  0,  0, 20, 20],
-    [20, 30, 10,  0,  0, 10, 30, 20]
-]
-
-PIECE_TABLES = {
-    'Pawn': PAWN_TABLE,
-    'Knight': KNIGHT_TABLE,
-    'Bishop': BISHOP_TABLE,
-    'Rook': ROOK_TABLE,
-    'Queen': QUEEN_TABLE,
-    'King': KING_TABLE
-}
+MAX_SEARCH_DEPTH = 32  # Iteration cap when the clock decides how deep to go
+TIME_CHECK_INTERVAL = 255  # Check the clock once every 256 nodes
+LOW_PRIORITY_SHARE = 0.5  # Most of the interpreter's time a low-priority search takes
+
+# Move ordering tiers, above any history score
+HASH_MOVE_SCORE = 1 << 30
+CAPTURE_SCORE = 1 << 28
+KILLER_SCORE = 1 << 27
+
+# Scores are in pawns from the side to move's point of view. Mates score
+# MATE_SCORE less the plies it takes, so shorter mates are preferred.
+MATE_SCORE = 10000
+MATE_THRESHOLD = MATE_SCORE - 1000  # Anything beyond this is a forced mate
+NULL_WINDOW = 1e-6  # Width of the zero windows used to test moves after the first
+ASPIRATION_WINDOW = 0.5  # Pawns either side of the last iteration's score
+ASPIRATION_MIN_DEPTH = 3  # Iterations shallower than this use a full window
+
+QUIESCENCE_MAX_PLY = 8  # Captures searched past the horizon before scoring regardless
+DELTA_MARGIN = 2  # Pawns of positional swing allowed for when delta pruning captures
+
+# Selective pruning, all off at PV nodes and in check
+NULL_MOVE_REDUCTION = 2  # Extra plies taken off the search after passing the turn
+NULL_MOVE_MIN_DEPTH = 3
+LMR_MIN_DEPTH = 3  # Late move reductions only where there's depth to take off
+LMR_MIN_INDEX = 3  # Moves searched in full before reducing the rest
+LMR_DEEP_INDEX = 8  # Moves this late are reduced by two plies instead of one
+FUTILITY_MARGINS = [0, 2, 4]  # Pawns a quiet move can gain, by remaining depth
+REVERSE_FUTILITY_MARGIN = 1.5  # Pawns per ply a position can lose before it stops beating beta
+REVERSE_FUTILITY_MAX_DEPTH = 3
+
+PARALLEL_MIN_DEPTH = 3  # Shallower iterations finish faster than handing moves to the workers
 
 class RandomAI:
     def __init__(self, color):
         self.color = color
 
-    def get_move(self, board):
+    def get_move(self, board, request=None):
         """
         Selects a random valid move for the AI.
         """
@@ -105,96 +60,210 @@ class RandomAI:
             selected_piece = random.choice(all_pieces)
             
             # Get its valid moves
-            moves = selected_piece.get_moves()
+            moves = selected_piece.get_moves(board)
             
             # If the piece has moves, choose a random one
             if moves:
                 return selected_piece, random.choice(moves)
 
 class MinimaxAI:
-    def __init__(self, color, depth=2):  # Reduced default depth for better performance
+    def __init__(self, color, depth=2, use_bitboards=False):  # Reduced default depth for better performance
         self.color = color
-        self.depth = depth
+        self.depth = depth  # Search depth when there is no clock to budget time from
+        self.use_bitboards = use_bitboards  # Search on a BitBoard copy of the position
+        self.clock = None  # ChessClock to budget thinking time from, set by the game
+        self.timer = TimeManager()
+        self.nodes = 0
+        self.completed_depth = 0  # Deepest iteration finished by the last search
+        self._can_stop = False
+        self.stop_flag = None  # Shared flag another process can set to abort the search
+        self.request = None  # SearchRequest of the search in progress
+        self.last_info = None  # Depth, score, pv, nodes and nps of the last finished iteration
+        self.ponder = False  # Search the expected reply on the opponent's time
+
+    def _search_board(self, board):
+        # Search a copy so an aborted iteration can't leave the real board mid-move
+        return BitBoard.from_board(board) if self.use_bitboards else board.copy()
+
+    def get_move(self, board, request=None):
+        """Search with iterative deepening and return the best move of the last finished iteration"""
+        search_board = self._search_board(board)
+        self.request = request
+        self.timer = self._time_manager(request)
+        self._work_start = time.monotonic()  # When a low-priority search last came back from giving way
+        self.nodes = 0
+        self.completed_depth = 0
+        self.last_info = None
+        self._can_stop = False  # The first iteration always finishes
+        moves = self._get_all_legal_moves(search_board, self.color)
+        if not moves:
+            return None  # Checkmated or stalemated: nothing to search
+        best_root_move = None
+
+        depth = 0
+        if request is not None:
+            # Skip the iterations an earlier search of the position already did
+            depth = max(0, min(request.start_depth, self._depth_limit()) - 1)
+        while depth < self._depth_limit():  # Rechecked each time, as a ponder hit can change it
+            depth += 1
+            if best_root_move is not None:
+                if not self.timer.can_start_iteration():
+                    break
+                # Search the previous iteration's best move first
+                moves.remove(best_root_move)
+                moves.insert(0, best_root_move)
+            try:
+                root_move, value = self._search_root(search_board, depth, moves)
+            except SearchTimeout:
+                break
+            if root_move is None:
+                break
+            best_root_move = root_move
+            self.completed_depth = depth
+            self._can_stop = True
+            self._report_iteration(search_board, depth, root_move, value)
+            if abs(value) >= MATE_THRESHOLD:
+                break  # A forced mate won't get any shorter by searching deeper
+
+        if best_root_move is None:
+            # Stopped before the first iteration finished: still play something,
+            # picked on a fresh copy as the stopped search left its own mid-move
+            best_root_move = self._fallback_move(self._search_board(board), moves)
+        start_pos, end_pos = best_root_move
+        return board.get_piece_at_position(start_pos), end_pos
+
+    def _fallback_move(self, board, moves):
+        return moves[0]
+
+    def _depth_limit(self):
+        request = self.request
+        if request is not None and request.depth is not None:
+            return min(request.depth, MAX_SEARCH_DEPTH)
+        if self.timer.timed or (request is not None and (request.nodes is not None or request.infinite)):
+            return MAX_SEARCH_DEPTH
+        return self.depth
+
+    def ponder_hit(self, request):
+        """The move pondered on was played: finish that search on the normal time budget"""
+        request.infinite = False
+        if self.request is request:
+            # The budget counts from the start of pondering, so if the opponent
+            # took a while the search may already be done and can answer at once
+            timer = self._time_manager(request)
+            timer.start_time = self.timer.start_time
+            self.timer = timer
+            if not timer.timed and self.completed_depth >= self.depth:
+                request.stop()  # Already as deep as an untimed search goes
+
+    def _time_manager(self, request):
+        if request is not None:
+            return request.time_manager(self.clock, self.color)
+        return TimeManager.for_clock(self.clock, self.color)
 
-    def get_move(self, board):
+    def _report_iteration(self, board, depth, best_move, score):
+        """Record a finished iteration and pass it to the request's on_info callback"""
+        self.last_info = self._iteration_info(board, depth, best_move, score)
+        if self.request is not None and self.request.on_info is not None:
+            self.request.on_info(self.last_info)
+
+    def _iteration_info(self, board, depth, best_move, score):
+        seconds = self.timer.elapsed()
+        return {
+            'depth': depth,
+            'score': score,
+            'pv': self._principal_variation(board, best_move, depth),
+            'nodes': self.nodes,
+            'seconds': seconds,
+            'nps': int(self.nodes / seconds) if seconds > 0 else 0,
+        }
+
+    def _principal_variation(self, board, best_move, depth):
+        # Plain minimax keeps no table to follow the line from
+        return [best_move]
+
+    def _stop_requested(self):
+        return self.request is not None and self.request.stopped
+
+    def _search_root(self, board, depth, moves):
         best_move = None
         best_value = -float('inf')
-        
-        for start_pos, end_pos in self._get_all_legal_moves(board, self.color):
-            piece_to_move = board.get_piece_at_position(start_pos)
-            undo_data = board._make_move_for_simulation(piece_to_move, start_pos, end_pos)
-            value = self.minimax(board, self.depth - 1, False)
-            board._undo_move_for_simulation(undo_data)
+        for start_pos, end_pos in moves:
+            board.make_move(start_pos, end_pos)
+            # Only a move beating the best so far matters, so the rest may fail low
+            value = -self.negamax(board, depth - 1, -float('inf'), -best_value, 1)
+            board.unmake_move()
             
             if value > best_value:
                 best_value = value
-                best_move = (piece_to_move, end_pos)
+                best_move = (start_pos, end_pos)
                 
-        return best_move
+        return best_move, best_value
+
+    def _count_node(self):
+        """Count a searched node, checking the hard time limit every so often"""
+        self.nodes += 1
+        request = self.request
+        if request is not None:
+            if request.stopped:
+                raise SearchTimeout()  # Checked every node, so a stopped search ends at once
+            if request.nodes is not None and self.nodes >= request.nodes and self._can_stop:
+                raise SearchTimeout()
+        if self.nodes & TIME_CHECK_INTERVAL == 0:
+            if self.stop_flag is not None and self.stop_flag.value:
+                raise SearchTimeout()
+            if self._can_stop and self.timer.hard_expired():
+                raise SearchTimeout()
+            if request is not None and request.low_priority:
+                self._give_way()
+
+    def _give_way(self):
+        # Sleep in proportion to the time just spent searching, letting the
+        # game's drawing and other searches have the interpreter meanwhile
+        worked = time.monotonic() - self._work_start
+        time.sleep(min(worked * (1 - LOW_PRIORITY_SHARE) / LOW_PRIORITY_SHARE, 0.1))
+        self._work_start = time.monotonic()
 
-    def minimax(self, board, depth, is_maximizing):
+    def negamax(self, board, depth, alpha, beta, ply, allow_null=True):
+        """Plain alpha-beta search, scored for the side to move"""
+        # Same root result as full-width minimax: no ordering, table or pruning
+        # beyond cutoffs, which AlphaBetaAI adds. allow_null is for its null moves.
+        self._count_node()
+        color = board.turn
         if depth == 0:
-            return self._evaluate_board(board)
+            return self._evaluate_for(board, color)
 
-        player_color = self.color if is_maximizing else ('white' if self.color == 'black' else 'black')
-        
-        if is_maximizing:
-            max_eval = -float('inf')
-            for start_pos, end_pos in self._get_all_legal_moves(board, player_color):
-                piece_to_move = board.get_piece_at_position(start_pos)
-                undo_data = board._make_move_for_simulation(piece_to_move, start_pos, end_pos)
-                eval = self.minimax(board, depth - 1, False)
-                board._undo_move_for_simulation(undo_data)
-                max_eval = max(max_eval, eval)
-            return max_eval if max_eval != -float('inf') else 0 # Return 0 if no legal moves (stalemate)
-        else: # Minimizing
-            min_eval = float('inf')
-            for start_pos, end_pos in self._get_all_legal_moves(board, player_color):
-                piece_to_move = board.get_piece_at_position(start_pos)
-                undo_data = board._make_move_for_simulation(piece_to_move, start_pos, end_pos)
-                eval = self.minimax(board, depth - 1, True)
-                board._undo_move_for_simulation(undo_data)
-                min_eval = min(min_eval, eval)
-            return min_eval if min_eval != float('inf') else 0 # Return 0 if no legal moves (stalemate)
+        moves = self._get_all_legal_moves(board, color)
+        if not moves:
+            return self._no_moves_score(board, color, ply)
+        best_value = -float('inf')
+        for start_pos, end_pos in moves:
+            board.make_move(start_pos, end_pos)
+            value = -self.negamax(board, depth - 1, -beta, -alpha, ply + 1)
+            board.unmake_move()
+            if value > best_value:
+                best_value = value
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        break
+        return best_value
+
+    def _no_moves_score(self, board, color, ply):
+        # Checkmate, sooner being worse, or stalemate
+        return -(MATE_SCORE - ply) if board.is_in_check(color) else 0
+
+    def _evaluate_for(self, board, color):
+        """Static evaluation from one side's point of view"""
+        score = self._evaluate_board(board)
+        return score if color == self.color else -score
 
     def _get_all_legal_moves(self, board, color):
-        moves = []
-        for x in range(8):
-            for y in range(8):
-                piece = board.get_piece_at_position((x, y))
-                if piece is not None and piece.color == color:
-                    start_pos = (x, y)
-                    for move in board.get_legal_moves_for_piece(piece):
-                        moves.append((start_pos, move))
-        return moves
+        return board.generate_legal_moves(color)
 
     def _evaluate_board(self, board):
-        score = 0
-        for x in range(8):
-            for y in range(8):
-                piece = board.get_piece_at_position((x, y))
-                if piece is not None:
-                    piece_type = type(piece).__name__
-                    base_value = PIECE_VALUES.get(piece_type, 0)
-                    
-                    # Get positional bonus from piece-square tables
-                    if piece_type in PIECE_TABLES:
-                        table = PIECE_TABLES[piece_type]
-                        # Flip table for black pieces
-                        if piece.color == 'black':
-                            positional_bonus = table[7-y][x] / 100.0
-                        else:
-                            positional_bonus = table[y][x] / 100.0
-                    else:
-                        positional_bonus = 0
-                    
-                    piece_value = base_value + positional_bonus
-                    
-                    if piece.color == self.color:
-                        score += piece_value
-                    else:
-                        score -= piece_value
-                        
+        # Material and piece-square totals are kept by the board as moves are made
+        score = board.psq_score(self.color) / 100.0
+
         # Add bonus for mobility (number of legal moves)
         our_moves = len(board.get_all_legal_moves_for_player(self.color))
         enemy_moves = len(board.get_all_legal_moves_for_player('white' if self.color == 'black' else 'black'))
@@ -209,66 +278,638 @@ class MinimaxAI:
             
         return score
 
+# Parallel root search
+#
+# The first root move is searched in the main process so there is a real alpha
+# to share, then the remaining moves go to a pool of worker processes (Young
+# Brothers Wait at the root). Each worker keeps its own AI, and with it its own
+# transposition table, for the life of the pool. Positions travel as FEN and
+# the best score so far is shared through a multiprocessing.Value, so a worker
+# starting a move searches it against the latest alpha.
+
+_worker_ai = None
+_worker_alpha = None
+_worker_search_id = None
+
+def _init_worker(ai_class, color, use_bitboards, tt_size_mb, settings, shared_alpha, stop_flag, shared_tt=None):
+    global _worker_ai, _worker_alpha
+    # Lazy SMP helpers attach to the main process's table instead of making their own
+    table_args = {'shared_tt': shared_tt} if shared_tt is not None else {}
+    _worker_ai = ai_class(color, use_bitboards=use_bitboards, tt_size_mb=tt_size_mb, **table_args)
+    for name, value in settings.items():
+        setattr(_worker_ai, name, value)
+    _worker_ai.stop_flag = stop_flag
+    _worker_alpha = shared_alpha
+
+def _search_root_move(fen, move, depth, beta, hard_limit, can_stop, search_id):
+    """Score one root move in a worker, returning (score or None if stopped, nodes)"""
+    global _worker_search_id
+    ai = _worker_ai
+    if search_id != _worker_search_id:
+        ai.tt.new_search()
+        _worker_search_id = search_id
+    board = Board.from_fen(fen)
+    if ai.use_bitboards:
+        board = BitBoard.from_board(board)
+    ai.timer = TimeManager(hard_limit=hard_limit)
+    ai._can_stop = can_stop
+    ai.nodes = 0
+    board.make_move(*move)
+    try:
+        value = ai._search_child(board, depth - 1, _worker_alpha.value, beta, 1, 1)
+    except SearchTimeout:
+        return None, ai.nodes
+    with _worker_alpha.get_lock():
+        if value > _worker_alpha.value:
+            _worker_alpha.value = value
+    return value, ai.nodes
+
+def _lazy_smp_helper(fen, worker, hard_limit):
+    """Search a position until stopped, returning (worker, nodes, seconds, deepest iteration)"""
+    ai = _worker_ai
+    board = Board.from_fen(fen)
+    if ai.use_bitboards:
+        board = BitBoard.from_board(board)
+    ai.timer = TimeManager(hard_limit=hard_limit)
+    ai._can_stop = True  # The main process always has an answer, so helpers may stop anywhere
+    ai.nodes = 0
+    ai.completed_depth = 0
+    ai.killers = [[None, None] for _ in range(MAX_SEARCH_DEPTH + 1)]
+    ai._previous_score = None
+    moves = ai._get_all_legal_moves(board, board.turn)
+    # Helpers differ from the main search and each other in where they start and
+    # in how ties in the root move order fall, so they fill the table with
+    # different parts of the tree
+    random.Random(worker).shuffle(moves)
+    depth = 1 + worker % 2
+    while moves and depth <= MAX_SEARCH_DEPTH:
+        try:
+            ai._search_root(board, depth, moves)
+        except SearchTimeout:
+            break
+        ai.completed_depth = depth
+        depth += 1
+    return worker, ai.nodes, ai.timer.elapsed(), ai.completed_depth
+
 class AlphaBetaAI(MinimaxAI):
-    def __init__(self, color, depth=3):  # Slightly deeper for "Hard" level
-        super().__init__(color, depth)
+    split_root = True  # With several workers, share out the root moves between them
+    symmetric_eval = True  # Evaluation scores the side to move the same whichever color the AI plays
+
+    def __init__(self, color, depth=3, use_bitboards=False, tt_size_mb=TT_SIZE_MB, workers=1):  # Slightly deeper for "Hard" level
+        super().__init__(color, depth, use_bitboards)
+        self.workers = workers  # Processes searching root moves, 1 to search in this process only
+        self._pool = None
+        self._pool_color = None
+        self._shared_alpha = None
+        self._root_fen = None
+        self._search_id = 0
+        self.tt = self._new_table(tt_size_mb)  # Kept between moves, and between colors if the evaluation is symmetric
+        self._tt_color = color
+        self.killers = [[None, None] for _ in range(MAX_SEARCH_DEPTH + 1)]  # Two quiet cutoff moves per ply
+        self.history = {}  # (color, start, end) -> bonus for quiet moves that caused cutoffs
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.use_quiescence = True  # Resolve captures at the horizon instead of scoring mid-exchange
+        self.qnodes = 0
+        self.researches = 0  # Zero-window and aspiration failures searched again with a wider window
+        self._previous_score = None
+        self._root_lines = []  # Ranked root moves of the iteration just searched, with multi-PV
+        self.use_null_move = True  # Pass the turn and cut off if the position still beats beta
+        self.use_lmr = True  # Search late quiet moves shallower first
+        self.use_futility = True  # Skip quiet moves near the horizon that can't reach alpha
+        self.ponder = True  # The table's principal variation gives a reply to ponder on
+        self._reset_pruning_stats()
+
+    def get_move(self, board, request=None):
+        if self._tt_color != self.color and not self.symmetric_eval:
+            # Stored scores came from evaluating for the other side
+            self.tt.clear()
+            self._tt_color = self.color
+        self.tt.new_search()
+        self.killers = [[None, None] for _ in range(MAX_SEARCH_DEPTH + 1)]
+        for move in list(self.history):
+            # Let old history fade so it doesn't outweigh this position's cutoffs
+            self.history[move] //= 2
+            if not self.history[move]:
+                del self.history[move]
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.qnodes = 0
+        self.researches = 0
+        self._previous_score = None
+        self._reset_pruning_stats()
+        if self.workers > 1 and self.split_root:
+            self._root_fen = board.to_fen()
+            self._search_id += 1
+        self._start_helpers(board, request)
+        return super().get_move(board, request)
+
+    def _new_table(self, size_mb):
+        return TranspositionTable(size_mb)
+
+    def _start_helpers(self, board, request):
+        # Lazy SMP starts its helper processes here, once the table is ready for the search
+        pass
+
+    def close(self):
+        """Shut down the worker processes of a parallel search"""
+        self._shutdown_pool()
+
+    def _shutdown_pool(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def _worker_pool(self):
+        if self._pool is not None and self._pool_color != self.color:
+            self._shutdown_pool()  # The workers' tables were scored for the other side
+        if self._pool is None:
+            self._shared_alpha = multiprocessing.Value('d', 0.0)
+            self.stop_flag = multiprocessing.Value('b', 0)
+            settings = {name: getattr(self, name) for name in
+                        ('use_quiescence', 'use_null_move', 'use_lmr', 'use_futility')}
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_worker,
+                initargs=(type(self), self.color, self.use_bitboards, self.tt.size_mb, settings,
+                          self._shared_alpha, self.stop_flag,
+                          self.tt if isinstance(self.tt, SharedTranspositionTable) else None))
+            self._pool_color = self.color
+        return self._pool
+
+    def _search_in_workers(self, depth, moves, alpha, beta):
+        """Best (move, score) among root moves searched across the worker pool"""
+        pool = self._worker_pool()
+        self._shared_alpha.value = alpha
+        hard_limit = None
+        if self.timer.hard_limit is not None:
+            hard_limit = max(0.0, self.timer.hard_limit - self.timer.elapsed())
+        pending = {pool.submit(_search_root_move, self._root_fen, move, depth, beta, hard_limit,
+                               self._can_stop, self._search_id): index
+                   for index, move in enumerate(moves)}
+        results = {}
+        try:
+            while pending:
+                done, _ = wait(pending, timeout=0.05, return_when=FIRST_COMPLETED)
+                if self._stop_requested():
+                    raise SearchTimeout()
+                for future in done:
+                    value, nodes = future.result()
+                    self.nodes += nodes
+                    if value is None:
+                        raise SearchTimeout()
+                    results[pending.pop(future)] = value
+                if results and max(results.values()) >= beta:
+                    break
+        finally:
+            if pending:
+                # Stop the workers still searching and wait so the next search starts clean
+                self.stop_flag.value = 1
+                for future in pending:
+                    future.cancel()
+                wait(pending)
+                self.stop_flag.value = 0
+        # Ties go to the earlier move in the ordering, as in the serial search
+        best_index = max(results, key=lambda index: (results[index], -index))
+        return moves[best_index], results[best_index]
+
+    def _reset_pruning_stats(self):
+        self.null_move_tries = 0
+        self.null_move_cutoffs = 0
+        self.lmr_reductions = 0
+        self.lmr_researches = 0
+        self.futility_prunes = 0
+        self.reverse_futility_prunes = 0
+
+    def pruning_stats(self):
+        """How often each pruning technique fired in the last search"""
+        return {
+            'null_move_tries': self.null_move_tries,
+            'null_move_cutoffs': self.null_move_cutoffs,
+            'lmr_reductions': self.lmr_reductions,
+            'lmr_researches': self.lmr_researches,
+            'futility_prunes': self.futility_prunes,
+            'reverse_futility_prunes': self.reverse_futility_prunes,
+        }
+
+    def _principal_variation(self, board, best_move, depth):
+        """Best line from the root, following hash moves through the transposition table"""
+        pv = [best_move]
+        board.make_move(*best_move)
+        seen = {board.position_hash}
+        while len(pv) < depth:
+            entry = self.tt.probe(board.position_hash)
+            if entry is None or entry[4] is None or entry[4] not in board.generate_legal_moves(board.turn):
+                break
+            pv.append(entry[4])
+            board.make_move(*entry[4])
+            if board.position_hash in seen:
+                break  # Repetition: the line would go round in circles
+            seen.add(board.position_hash)
+        for _ in pv:
+            board.unmake_move()
+        return pv
 
-    def get_move(self, board):
+    def _fallback_move(self, board, moves):
+        # The move ordering's first pick, led by any hash move a ponder or earlier search left
+        entry = self.tt.probe(board.position_hash)
+        return self._order_moves(board, moves, 0, entry[4] if entry is not None else None, board.turn)[0]
+
+    def ordering_stats(self):
+        """How often the first move searched at a node was enough to cut it off"""
+        return {
+            'cutoffs': self.cutoffs,
+            'first_move_cutoffs': self.first_move_cutoffs,
+            'first_move_rate': self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0,
+        }
+
+    def _is_capture(self, board, start_pos, end_pos):
+        if board.get_piece_at_position(end_pos) is not None:
+            return True
+        # A pawn moving diagonally onto an empty square captures en passant
+        return start_pos[0] != end_pos[0] and board.get_piece_at_position(start_pos).kind == 'Pawn'
+
+    def _capture_gain(self, board, start_pos, end_pos):
+        """Material a capture or promotion wins, 0 for a quiet move"""
+        piece = board.get_piece_at_position(start_pos)
+        victim = board.get_piece_at_position(end_pos)
+        gain = PIECE_VALUES[victim.kind] if victim is not None else 0
+        if piece.kind == 'Pawn':
+            if victim is None and start_pos[0] != end_pos[0]:
+                gain = PIECE_VALUES['Pawn']  # En passant
+            if end_pos[1] in (0, 7):
+                gain += PIECE_VALUES['Queen'] - PIECE_VALUES['Pawn']
+        return gain
+
+    def quiescence(self, board, alpha, beta, ply, qply=0):
+        """Search captures past the horizon until the position is quiet, then score it"""
+        self._count_node()
+        self.qnodes += 1
+        color = board.turn
+        if qply >= QUIESCENCE_MAX_PLY:
+            return self._evaluate_for(board, color)
+
+        if board.is_in_check(color):
+            # No standing pat in check: every evasion has to be looked at
+            stand_pat = None
+            best_value = -float('inf')
+            moves = [(None, move) for move in self._get_all_legal_moves(board, color)]
+            if not moves:
+                return self._no_moves_score(board, color, ply)
+        else:
+            # Stand pat: the side to move can decline every capture
+            stand_pat = best_value = self._evaluate_for(board, color)
+            if stand_pat >= beta:
+                return stand_pat
+            alpha = max(alpha, stand_pat)
+            captures = []
+            for start_pos, end_pos in self._get_all_legal_moves(board, color):
+                gain = self._capture_gain(board, start_pos, end_pos)
+                if gain:
+                    attacker = board.get_piece_at_position(start_pos)
+                    captures.append((gain * 100 - PIECE_VALUES[attacker.kind], gain, (start_pos, end_pos)))
+            captures.sort(key=lambda item: item[0], reverse=True)
+            moves = [(gain, move) for _, gain, move in captures]
+
+        for gain, (start_pos, end_pos) in moves:
+            # Delta pruning: skip captures that can't reach alpha even with a positional swing
+            if gain is not None and stand_pat + gain + DELTA_MARGIN <= alpha:
+                continue
+            board.make_move(start_pos, end_pos)
+            value = -self.quiescence(board, -beta, -alpha, ply + 1, qply + 1)
+            board.unmake_move()
+            if value > best_value:
+                best_value = value
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        break
+        return best_value
+
+    def _order_moves(self, board, moves, ply, hash_move, color):
+        """Hash move, then captures by MVV-LVA and promotions, then killers, then quiet moves by history"""
+        killers = self.killers[ply]
+        history = self.history
+        scored = []
+        for move in moves:
+            start_pos, end_pos = move
+            if move == hash_move:
+                score = HASH_MOVE_SCORE
+            else:
+                attacker = board.get_piece_at_position(start_pos)
+                victim = board.get_piece_at_position(end_pos)
+                if victim is not None:
+                    score = CAPTURE_SCORE + PIECE_VALUES[victim.kind] * 100 - PIECE_VALUES[attacker.kind]
+                elif attacker.kind == 'Pawn' and (start_pos[0] != end_pos[0] or end_pos[1] in (0, 7)):
+                    # En passant captures a pawn, promotion gains a queen
+                    score = CAPTURE_SCORE + (PIECE_VALUES['Pawn'] if start_pos[0] != end_pos[0] else PIECE_VALUES['Queen']) * 100
+                elif move == killers[0]:
+                    score = KILLER_SCORE
+                elif move == killers[1]:
+                    score = KILLER_SCORE - 1
+                else:
+                    score = history.get((color, start_pos, end_pos), 0)
+            scored.append((score, move))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [move for _, move in scored]
+
+    def _record_cutoff(self, board, move, index, ply, depth, color):
+        self.cutoffs += 1
+        if index == 0:
+            self.first_move_cutoffs += 1
+        if self._is_capture(board, *move):
+            return
+        killers = self.killers[ply]
+        if move != killers[0]:
+            killers[1] = killers[0]
+            killers[0] = move
+        key = (color, move[0], move[1])
+        self.history[key] = self.history.get(key, 0) + depth * depth
+
+    def _search_root(self, board, depth, moves):
+        best_move, best_value = self._search_aspiration(board, depth, moves)
+        count = self.request.multi_pv if self.request is not None else 1
+        if count <= 1 or best_move is None:
+            return best_move, best_value
+
+        # Multi-PV: rank the next best moves by searching again without the
+        # ones already ranked. Each pass reuses the table the earlier ones filled.
+        lines = [(best_move, best_value, self._principal_variation(board, best_move, depth))]
+        remaining = [move for move in moves if move != best_move]
+        while remaining and len(lines) < count:
+            move, value = self._search_window(board, depth, remaining, -float('inf'), float('inf'), store=False)
+            lines.append((move, value, self._principal_variation(board, move, depth)))
+            remaining.remove(move)
+        lines.sort(key=lambda line: line[1], reverse=True)
+        self._root_lines = [{'move': move, 'score': value, 'pv': pv} for move, value, pv in lines]
+        return best_move, best_value
+
+    def _iteration_info(self, board, depth, best_move, score):
+        info = super()._iteration_info(board, depth, best_move, score)
+        if self.request is not None and self.request.multi_pv > 1:
+            info['lines'] = self._root_lines
+        return info
+
+    def _search_aspiration(self, board, depth, moves):
+        # Aspiration: expect a score close to the last iteration's and search a
+        # narrow window around it, widening the side that fails
+        previous = self._previous_score
+        if depth >= ASPIRATION_MIN_DEPTH and previous is not None and abs(previous) < MATE_THRESHOLD:
+            alpha, beta = previous - ASPIRATION_WINDOW, previous + ASPIRATION_WINDOW
+        else:
+            alpha, beta = -float('inf'), float('inf')
+
+        while True:
+            best_move, best_value = self._search_window(board, depth, moves, alpha, beta)
+            if best_move is None:
+                break  # No moves to search, so no window will do better
+            if best_value <= alpha:
+                alpha = -float('inf')
+            elif best_value >= beta:
+                beta = float('inf')
+            else:
+                break
+            self.researches += 1
+
+        self._previous_score = best_value
+        return best_move, best_value
+
+    def _search_window(self, board, depth, moves, alpha, beta, store=True):
+        """Principal variation search of the root moves inside one window"""
+        key = board.position_hash
+        original_alpha = alpha
+        entry = self.tt.probe(key)
+        moves = self._order_moves(board, moves, 0, entry[4] if entry is not None else None, board.turn)
+        parallel = self.workers > 1 and depth >= PARALLEL_MIN_DEPTH and self._root_fen is not None
         best_move = None
         best_value = -float('inf')
-        
-        for start_pos, end_pos in self._get_all_legal_moves(board, self.color):
-            piece_to_move = board.get_piece_at_position(start_pos)
-            undo_data = board._make_move_for_simulation(piece_to_move, start_pos, end_pos)
-            value = self.minimax(board, self.depth - 1, -float('inf'), float('inf'), False)
-            board._undo_move_for_simulation(undo_data)
-            
+        for index, (start_pos, end_pos) in enumerate(moves):
+            if parallel and index == 1:
+                # The eldest brother is done: the rest go to the workers together
+                (start_pos, end_pos), value = self._search_in_workers(depth, moves[1:], alpha, beta)
+            else:
+                board.make_move(start_pos, end_pos)
+                value = self._search_child(board, depth - 1, alpha, beta, 1, index)
+                board.unmake_move()
             if value > best_value:
                 best_value = value
-                best_move = (piece_to_move, end_pos)
-                
-        return best_move
+                best_move = (start_pos, end_pos)
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        break
+            if parallel and index == 1:
+                break
 
-    def minimax(self, board, depth, alpha, beta, is_maximizing):
-        if depth == 0:
-            return self._evaluate_board(board)
+        if best_move is not None and store:  # Lines after the first leave the root entry to the best move
+            self.tt.store(key, depth, self._bound_flag(best_value, original_alpha, beta),
+                          self._score_to_tt(best_value, 0), best_move)
+        return best_move, best_value
 
-        player_color = self.color if is_maximizing else ('white' if self.color == 'black' else 'black')
-        
-        if is_maximizing:
-            max_eval = -float('inf')
-            for start_pos, end_pos in self._get_all_legal_moves(board, player_color):
-                piece_to_move = board.get_piece_at_position(start_pos)
-                undo_data = board._make_move_for_simulation(piece_to_move, start_pos, end_pos)
-                eval = self.minimax(board, depth - 1, alpha, beta, False)
-                board._undo_move_for_simulation(undo_data)
-                max_eval = max(max_eval, eval)
-                alpha = max(alpha, eval)
-                if beta <= alpha:
-                    break # Prune
-            return max_eval if max_eval != -float('inf') else 0
-        else: # Minimizing
-            min_eval = float('inf')
-            for start_pos, end_pos in self._get_all_legal_moves(board, player_color):
-                piece_to_move = board.get_piece_at_position(start_pos)
-                undo_data = board._make_move_for_simulation(piece_to_move, start_pos, end_pos)
-                eval = self.minimax(board, depth - 1, alpha, beta, True)
-                board._undo_move_for_simulation(undo_data)
-                min_eval = min(min_eval, eval)
-                beta = min(beta, eval)
-                if beta <= alpha:
-                    break # Prune
-            return min_eval if min_eval != float('inf') else 0 
+    def _search_child(self, board, depth, alpha, beta, ply, index):
+        """Score a move just played: the first in full, the rest with a zero window first"""
+        if index == 0:
+            return -self.negamax(board, depth, -beta, -alpha, ply)
+        value = -self.negamax(board, depth, -alpha - NULL_WINDOW, -alpha, ply)
+        if alpha < value < beta:
+            # Better than the principal variation after all: get its exact score
+            self.researches += 1
+            value = -self.negamax(board, depth, -beta, -alpha, ply)
+        return value
+
+    def negamax(self, board, depth, alpha, beta, ply, allow_null=True):
+        """Principal variation search, scored for the side to move"""
+        if depth <= 0:
+            if self.use_quiescence:
+                return self.quiescence(board, alpha, beta, ply)
+            self._count_node()
+            return self._evaluate_for(board, board.turn)
+        self._count_node()
+
+        # Reuse an earlier search of this position when it went deep enough
+        key = board.position_hash
+        entry = self.tt.probe(key)
+        hash_move = None
+        if entry is not None:
+            _, entry_depth, flag, score, hash_move, _ = entry
+            if entry_depth >= depth:
+                score = self._score_from_tt(score, ply)
+                if flag == EXACT:
+                    return score
+                if flag == LOWER_BOUND:
+                    alpha = max(alpha, score)
+                else:
+                    beta = min(beta, score)
+                if alpha >= beta:
+                    return score
+        # The result is only exact inside the window actually searched, so its
+        # flag is worked out against the window as narrowed by the table
+        original_alpha = alpha
+
+        color = board.turn
+        moves = self._get_all_legal_moves(board, color)
+        if not moves:
+            return self._no_moves_score(board, color, ply)
+
+        # Zero-window nodes away from mate scores are where pruning is safe
+        in_check = board.is_in_check(color)
+        can_prune = (not in_check and beta - alpha <= NULL_WINDOW * 2
+                     and abs(alpha) < MATE_THRESHOLD and abs(beta) < MATE_THRESHOLD)
+        static_eval = None
+        if can_prune and (self.use_futility or self.use_null_move):
+            static_eval = self._evaluate_for(board, color)
+
+            # Reverse futility: far enough above beta that a shallow search won't drag it back
+            if (self.use_futility and depth <= REVERSE_FUTILITY_MAX_DEPTH
+                    and static_eval - REVERSE_FUTILITY_MARGIN * depth >= beta):
+                self.reverse_futility_prunes += 1
+                return static_eval
+
+            # Null move: if passing still beats beta, a real move will too
+            if (self.use_null_move and allow_null and depth >= NULL_MOVE_MIN_DEPTH
+                    and static_eval >= beta and board.has_non_pawn_material(color)):
+                self.null_move_tries += 1
+                board.make_null_move()
+                value = -self.negamax(board, depth - 1 - NULL_MOVE_REDUCTION, -beta, -beta + NULL_WINDOW,
+                                      ply + 1, allow_null=False)
+                board.unmake_null_move()
+                if value >= beta:
+                    self.null_move_cutoffs += 1
+                    return beta if value >= MATE_THRESHOLD else value
+
+        futile = (self.use_futility and static_eval is not None and depth < len(FUTILITY_MARGINS)
+                  and static_eval + FUTILITY_MARGINS[depth] <= alpha)
+        moves = self._order_moves(board, moves, ply, hash_move, color)
+        killers = self.killers[ply]
+
+        best_move = None
+        best_value = -float('inf')
+        for index, move in enumerate(moves):
+            start_pos, end_pos = move
+            quiet = (index > 0 and not in_check and move not in killers
+                     and not self._capture_gain(board, start_pos, end_pos))
+            board.make_move(start_pos, end_pos)
+            if quiet and board.is_in_check(board.turn):
+                quiet = False  # Checks are never pruned or reduced
+            if quiet and futile:
+                # Futility: this quiet move can't lift the score to alpha before the horizon
+                board.unmake_move()
+                self.futility_prunes += 1
+                best_value = max(best_value, static_eval + FUTILITY_MARGINS[depth])
+                continue
+            if quiet and self.use_lmr and depth >= LMR_MIN_DEPTH and index >= LMR_MIN_INDEX:
+                # Late move reduction: a shallower zero-window look first, in full only if it beats alpha
+                reduction = 2 if index >= LMR_DEEP_INDEX and depth > 3 else 1
+                self.lmr_reductions += 1
+                value = -self.negamax(board, depth - 1 - reduction, -alpha - NULL_WINDOW, -alpha, ply + 1)
+                if value > alpha:
+                    self.lmr_researches += 1
+                    value = self._search_child(board, depth - 1, alpha, beta, ply + 1, index)
+            else:
+                value = self._search_child(board, depth - 1, alpha, beta, ply + 1, index)
+            board.unmake_move()
+            if value > best_value:
+                best_value = value
+                best_move = (start_pos, end_pos)
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        self._record_cutoff(board, best_move, index, ply, depth, color)
+                        break
+
+        self.tt.store(key, depth, self._bound_flag(best_value, original_alpha, beta),
+                      self._score_to_tt(best_value, ply), best_move)
+        return best_value
+
+    def _bound_flag(self, value, alpha, beta):
+        if value <= alpha:
+            return UPPER_BOUND
+        if value >= beta:
+            return LOWER_BOUND
+        return EXACT
+
+    # Mate scores count plies from the root; the table stores them counted from
+    # the node instead, so they stay right wherever the position turns up again
+    def _score_to_tt(self, score, ply):
+        if score >= MATE_THRESHOLD:
+            return score + ply
+        if score <= -MATE_THRESHOLD:
+            return score - ply
+        return score
+
+    def _score_from_tt(self, score, ply):
+        if score >= MATE_THRESHOLD:
+            return score - ply
+        if score <= -MATE_THRESHOLD:
+            return score + ply
+        return score
 
 class ExpertAI(AlphaBetaAI):
     """Strongest AI with deepest search and advanced evaluation"""
-    def __init__(self, color, depth=4):
-        super().__init__(color, depth)
+    def __init__(self, color, depth=4, use_bitboards=True, tt_size_mb=TT_SIZE_MB, workers=1):
+        super().__init__(color, depth, use_bitboards, tt_size_mb, workers)
+
+class LazySMPAI(AlphaBetaAI):
+    """Alpha-beta with helper processes searching the same position through one shared table"""
+    split_root = False
+
+    def __init__(self, color, depth=4, use_bitboards=True, tt_size_mb=TT_SIZE_MB, workers=2, shared_tt=None):
+        self._shared_tt = shared_tt  # Table to attach to, picked up by _new_table
+        super().__init__(color, depth, use_bitboards, tt_size_mb, workers)
+        self.worker_stats = []  # Nodes, time and nps of each process in the last search
+        self._helpers = []
+
+    def _new_table(self, size_mb):
+        return self._shared_tt if self._shared_tt is not None else SharedTranspositionTable(size_mb)
+
+    def get_move(self, board, request=None):
+        self._helpers = []
+        try:
+            move = super().get_move(board, request)
+        finally:
+            if self._helpers:
+                self.stop_flag.value = 1
+                wait(self._helpers)
+                self.stop_flag.value = 0
+
+        seconds = self.timer.elapsed()
+        self.worker_stats = [self._worker_entry(0, self.nodes, seconds, self.completed_depth)]
+        for future in self._helpers:
+            self.worker_stats.append(self._worker_entry(*future.result()))
+        return move
+
+    def _start_helpers(self, board, request):
+        # The table was cleared or aged for this search before any helper writes to it
+        if self.workers > 1:
+            pool = self._worker_pool()
+            hard_limit = self._time_manager(request).hard_limit
+            fen = board.to_fen()
+            self._helpers = [pool.submit(_lazy_smp_helper, fen, worker, hard_limit) for worker in range(1, self.workers)]
+
+    def _worker_entry(self, worker, nodes, seconds, depth):
+        return {'worker': worker, 'nodes': nodes, 'seconds': seconds, 'depth': depth,
+                'nps': int(nodes / seconds) if seconds > 0 else 0}
+
+    def smp_stats(self):
+        """Nodes per second of each process and of the whole search"""
+        nodes = sum(entry['nodes'] for entry in self.worker_stats)
+        seconds = max((entry['seconds'] for entry in self.worker_stats), default=0)
+        return {
+            'workers': self.worker_stats,
+            'nodes': nodes,
+            'nps': int(nodes / seconds) if seconds > 0 else 0,
+        }
+
+    def close(self):
+        """Shut down the helper processes and free the shared table"""
+        super().close()
+        self.tt.close()
 
 class AggressiveAI(AlphaBetaAI):
     """AI that prefers attacking moves and piece activity - Medium-Hard difficulty"""
-    def __init__(self, color, depth=3):
-        super().__init__(color, depth)
+    symmetric_eval = False  # Bonuses only count for its own color
+
+    def __init__(self, color, depth=3, use_bitboards=False, tt_size_mb=TT_SIZE_MB, workers=1):
+        super().__init__(color, depth, use_bitboards, tt_size_mb, workers)
         
     def _evaluate_board(self, board):
         score = super()._evaluate_board(board)
@@ -289,7 +930,7 @@ class AggressiveAI(AlphaBetaAI):
                 piece = board.get_piece_at_position((x, y))
                 if piece is not None and piece.color == self.color:
                     # Count attacks rather than evaluating each move
-                    attack_count = len([m for m in piece.get_moves() 
+                    attack_count = len([m for m in piece.get_moves(board) 
                                       if board.get_piece_at_position(m) and 
                                       board.get_piece_at_position(m).color == enemy_color])
                     score += attack_count * 0.05  # Small bonus per attack
@@ -298,8 +939,10 @@ class AggressiveAI(AlphaBetaAI):
 
 class DefensiveAI(AlphaBetaAI):
     """AI that prefers solid, defensive moves and king safety - Medium-Hard difficulty"""
-    def __init__(self, color, depth=3):
-        super().__init__(color, depth)
+    symmetric_eval = False  # Bonuses only count for its own color
+
+    def __init__(self, color, depth=3, use_bitboards=False, tt_size_mb=TT_SIZE_MB, workers=1):
+        super().__init__(color, depth, use_bitboards, tt_size_mb, workers)
         
     def _evaluate_board(self, board):
         score = super()._evaluate_board(board)
@@ -0,0 +1,105 @@
+import queue
+import threading
+
+from search_request import SearchRequest
+
+# Background searches for the game loop
+#
+# An AIWorker owns one AI and a thread that runs its searches one at a time, so
+# the AI's tables are never used by two searches at once. search() hands back a
+# SearchHandle straight away; the game polls it each frame and keeps drawing
+# while the AI thinks. Each search works on its own copy of the board, so the
+# game can carry on changing the real one.
+#
+# Pondering: after the AI moves, ponder() searches the position after the reply
+# its principal variation expects, with no time limit, while the opponent
+# thinks. If that reply is played, ponder_hit() turns the same search into the
+# AI's move search on its normal budget, counted from when pondering began. If
+# not, the ponder search is cancelled; what it stored in the AI's transposition
+# table stays for the real search.
+
+class SearchHandle:
+    """Future-like handle on one search queued on an AIWorker"""
+    def __init__(self, board, color, request):
+        self.board = board  # Copy of the position being searched
+        self.color = color
+        self.request = request  # Limits and stop flag passed to the AI's get_move
+        self.position_hash = board.position_hash  # Identifies the position searched, e.g. to check a ponder hit
+        self.info = None  # The AI's last_info once the search is done
+        self._cancelled = False  # A request can also be stopped just to answer sooner
+        self._done_event = threading.Event()
+        self._result = None
+        self._error = None
+
+    def cancel(self):
+        """Ask the search to stop; a cancelled search finishes with no result"""
+        self._cancelled = True
+        self.request.stop()
+
+    def cancelled(self):
+        return self._cancelled
+
+    def done(self):
+        return self._done_event.is_set()
+
+    def result(self, timeout=None):
+        """The AI's (piece, end_pos), waiting up to timeout seconds for it"""
+        if not self._done_event.wait(timeout):
+            raise TimeoutError("search still running")
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+    def _finish(self, result=None, error=None, info=None):
+        self._result = None if self.cancelled() else result
+        self._error = error
+        self.info = info
+        self._done_event.set()
+
+class AIWorker:
+    """Runs one AI's searches on a background thread"""
+    def __init__(self, ai):
+        self.ai = ai
+        self._jobs = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def search(self, board, color=None, request=None):
+        """Start searching a copy of board for color (default: the AI's own), returning a SearchHandle"""
+        handle = SearchHandle(board.copy(), color or self.ai.color, request or SearchRequest())
+        self._jobs.put(handle)
+        return handle
+
+    def ponder(self, board, expected_move):
+        """Start searching, with no time limit, the position after the opponent plays expected_move (None if it ends the game)"""
+        position = board.copy()
+        position.make_move(*expected_move)
+        if position.check_game_status(self.ai.color) is not None:
+            return None
+        handle = SearchHandle(position, self.ai.color, SearchRequest(infinite=True))
+        self._jobs.put(handle)
+        return handle
+
+    def ponder_hit(self, handle):
+        """The expected move was played: let the ponder search finish as the AI's move search"""
+        self.ai.ponder_hit(handle.request)
+
+    def close(self):
+        """Let the thread finish the searches already queued and exit"""
+        self._jobs.put(None)
+
+    def _run(self):
+        while True:
+            handle = self._jobs.get()
+            if handle is None:
+                break
+            if handle.cancelled():
+                handle._finish()
+                continue
+            self.ai.color = handle.color
+            try:
+                result = self.ai.get_move(handle.board, handle.request)
+            except Exception as error:
+                handle._finish(error=error)
+            else:
+                handle._finish(result, info=getattr(self.ai, 'last_info', None))
@@ -0,0 +1,564 @@
+# Bitboard position backend
+#
+# BitBoard keeps one 64-bit integer per (color, piece type) plus occupancy
+# masks, and exposes the same public methods as board.Board so the AI can
+# search on it directly. Square index is y * 8 + x, matching the (x, y)
+# positions used everywhere else (y = 0 is white's back rank).
+from evaluation import PIECE_SQUARE_VALUES
+from zobrist import PIECE_KEYS, BLACK_TO_MOVE_KEY, CASTLING_KEYS, EP_FILE_KEYS
+
+WHITE, BLACK = 0, 1
+COLOR_NAMES = ('white', 'black')
+COLOR_INDEX = {'white': WHITE, 'black': BLACK}
+
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+KIND_NAMES = ('Pawn', 'Knight', 'Bishop', 'Rook', 'Queen', 'King')
+KIND_INDEX = {name: kind for kind, name in enumerate(KIND_NAMES)}
+PROMOTION_KINDS = {'queen': QUEEN, 'rook': ROOK, 'bishop': BISHOP, 'knight': KNIGHT}
+
+# Castling rights bits
+WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE = 1, 2, 4, 8
+
+SQUARE_POSITIONS = [(sq % 8, sq // 8) for sq in range(64)]
+
+# Zobrist keys indexed by piece code and square
+CODE_KEYS = [PIECE_KEYS[KIND_NAMES[code % 6], COLOR_NAMES[code // 6]] for code in range(12)]
+
+# Material plus piece-square bonus in centipawns, indexed by piece code and square
+CODE_VALUES = [PIECE_SQUARE_VALUES[KIND_NAMES[code % 6], COLOR_NAMES[code // 6]] for code in range(12)]
+
+def _castling_masks():
+    masks = [0b1111] * 64
+    masks[4] &= ~(WHITE_KINGSIDE | WHITE_QUEENSIDE)
+    masks[7] &= ~WHITE_KINGSIDE
+    masks[0] &= ~WHITE_QUEENSIDE
+    masks[60] &= ~(BLACK_KINGSIDE | BLACK_QUEENSIDE)
+    masks[63] &= ~BLACK_KINGSIDE
+    masks[56] &= ~BLACK_QUEENSIDE
+    return masks
+
+# Rights that survive a move touching each square (king or rook home squares clear theirs)
+CASTLING_MASKS = _castling_masks()
+
+def square_of(position):
+    x, y = position
+    return y * 8 + x
+
+def _leaper_attacks(offsets):
+    table = []
+    for sq in range(64):
+        x, y = SQUARE_POSITIONS[sq]
+        mask = 0
+        for dx, dy in offsets:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < 8 and 0 <= ny < 8:
+                mask |= 1 << (ny * 8 + nx)
+        table.append(mask)
+    return table
+
+KNIGHT_ATTACKS = _leaper_attacks([(1, 2), (1, -2), (-1, 2), (-1, -2), (2, 1), (2, -1), (-2, 1), (-2, -1)])
+KING_ATTACKS = _leaper_attacks([(1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1)])
+# PAWN_ATTACKS[color][sq] = squares attacked by a pawn of that color standing on sq
+PAWN_ATTACKS = (_leaper_attacks([(1, 1), (-1, 1)]), _leaper_attacks([(1, -1), (-1, -1)]))
+
+# Sliding directions: positive ones walk towards higher square indices
+ROOK_DIRECTIONS = [((0, 1), True), ((1, 0), True), ((0, -1), False), ((-1, 0), False)]
+BISHOP_DIRECTIONS = [((1, 1), True), ((-1, 1), True), ((1, -1), False), ((-1, -1), False)]
+
+def _rays(directions):
+    rays = []
+    for (dx, dy), positive in directions:
+        table = []
+        for sq in range(64):
+            x, y = SQUARE_POSITIONS[sq]
+            mask = 0
+            nx, ny = x + dx, y + dy
+            while 0 <= nx < 8 and 0 <= ny < 8:
+                mask |= 1 << (ny * 8 + nx)
+                nx, ny = nx + dx, ny + dy
+            table.append(mask)
+        rays.append((table, positive))
+    return rays
+
+ROOK_RAYS = _rays(ROOK_DIRECTIONS)
+BISHOP_RAYS = _rays(BISHOP_DIRECTIONS)
+
+def _slider_attacks(sq, occupied, rays):
+    attacks = 0
+    for table, positive in rays:
+        ray = table[sq]
+        blockers = ray & occupied
+        if blockers:
+            if positive:
+                first = (blockers & -blockers).bit_length() - 1
+            else:
+                first = blockers.bit_length() - 1
+            ray ^= table[first]
+        attacks |= ray
+    return attacks
+
+def _between_table():
+    table = [[0] * 64 for _ in range(64)]
+    for rays in (ROOK_RAYS, BISHOP_RAYS):
+        for ray_table, _ in rays:
+            for sq in range(64):
+                ray = ray_table[sq]
+                target_bits = ray
+                while target_bits:
+                    low = target_bits & -target_bits
+                    target = low.bit_length() - 1
+                    table[sq][target] = (ray ^ ray_table[target]) ^ low
+                    target_bits ^= low
+    return table
+
+# BETWEEN[a][b] = squares strictly between two aligned squares, 0 if not aligned
+BETWEEN = _between_table()
+ALL_SQUARES = (1 << 64) - 1
+
+def rook_attacks(sq, occupied):
+    return _slider_attacks(sq, occupied, ROOK_RAYS)
+
+def bishop_attacks(sq, occupied):
+    return _slider_attacks(sq, occupied, BISHOP_RAYS)
+
+def iter_bits(bb):
+    """Yield the square index of every set bit"""
+    while bb:
+        low = bb & -bb
+        yield low.bit_length() - 1
+        bb ^= low
+
+class BitboardPiece:
+    """Lightweight view of a piece on a BitBoard, mirroring the ChessPiece interface"""
+    __slots__ = ('kind', 'color', 'position')
+
+    def __init__(self, kind, color, position):
+        self.kind = kind
+        self.color = color
+        self.position = position
+
+    def get_moves(self, board):
+        return board._pseudo_moves_for_position(self.position)
+
+    def can_promote(self):
+        return self.kind == 'Pawn' and self.position[1] == (7 if self.color == 'white' else 0)
+
+class BitBoard:
+    def __init__(self):
+        self.bitboards = [0] * 12  # Index color * 6 + kind
+        self.occupancy = [0, 0]
+        self.occupied = 0
+        self.squares = [None] * 64  # Piece code per square, for O(1) lookups
+        self.castling = 0
+        self.ep_square = None  # Square a pawn can capture onto en passant
+        self.turn = 'white'
+        self._hash = 0
+        self.psq_totals = [0, 0]  # Centipawns per color index, kept up to date by _put and _remove
+        self.king_position = {'white': None, 'black': None}
+        self.captured_pieces = {'white': [], 'black': []}
+        self.promotion_pending = None
+        self._undo_stack = []  # One entry per move played, for unmake_move
+
+    @classmethod
+    def from_board(cls, board):
+        """Build a BitBoard holding the same position as a board.Board"""
+        bitboard = cls()
+        for x in range(8):
+            for y in range(8):
+                piece = board.get_piece_at_position((x, y))
+                if piece is not None:
+                    bitboard._put(COLOR_INDEX[piece.color] * 6 + KIND_INDEX[piece.kind], y * 8 + x)
+
+        # Both backends number the castling rights the same way
+        bitboard.castling = board.castling_rights
+
+        # En passant target comes from a pawn double step on the last move
+        if board.last_move is not None:
+            last_piece, last_start, last_end = board.last_move
+            if last_piece.kind == 'Pawn' and abs(last_end[1] - last_start[1]) == 2:
+                bitboard.ep_square = ((last_start[1] + last_end[1]) // 2) * 8 + last_end[0]
+        bitboard.turn = board.turn
+        bitboard._refresh_hash()
+        return bitboard
+
+    def copy(self):
+        new_board = BitBoard()
+        new_board.bitboards = self.bitboards[:]
+        new_board.occupancy = self.occupancy[:]
+        new_board.occupied = self.occupied
+        new_board.squares = self.squares[:]
+        new_board.castling = self.castling
+        new_board.ep_square = self.ep_square
+        new_board.turn = self.turn
+        new_board._hash = self._hash
+        new_board.psq_totals = self.psq_totals[:]
+        new_board.king_position = self.king_position.copy()
+        new_board.captured_pieces = {color: list(pieces) for color, pieces in self.captured_pieces.items()}
+        return new_board
+
+    @property
+    def position_hash(self):
+        """Zobrist hash of the position, side to move, castling rights and en passant file"""
+        return self._hash
+
+    def _refresh_hash(self):
+        """Recompute the Zobrist hash from scratch"""
+        key = 0
+        for sq in range(64):
+            code = self.squares[sq]
+            if code is not None:
+                key ^= CODE_KEYS[code][sq]
+        if self.turn == 'black':
+            key ^= BLACK_TO_MOVE_KEY
+        if self.ep_square is not None:
+            key ^= EP_FILE_KEYS[self.ep_square % 8]
+        self._hash = key ^ CASTLING_KEYS[self.castling]
+
+    def _put(self, code, sq):
+        bit = 1 << sq
+        self.bitboards[code] |= bit
+        self.occupancy[code // 6] |= bit
+        self.occupied |= bit
+        self.squares[sq] = code
+        self._hash ^= CODE_KEYS[code][sq]
+        self.psq_totals[code // 6] += CODE_VALUES[code][sq]
+        if code % 6 == KING:
+            self.king_position[COLOR_NAMES[code // 6]] = SQUARE_POSITIONS[sq]
+
+    def _remove(self, code, sq):
+        bit = 1 << sq
+        self.bitboards[code] ^= bit
+        self.occupancy[code // 6] ^= bit
+        self.occupied ^= bit
+        self.squares[sq] = None
+        self._hash ^= CODE_KEYS[code][sq]
+        self.psq_totals[code // 6] -= CODE_VALUES[code][sq]
+
+    def psq_score(self, color):
+        """Material and piece-square total of color less the opponent's, in centipawns"""
+        totals = self.psq_totals
+        return totals[0] - totals[1] if color == 'white' else totals[1] - totals[0]
+
+    def has_non_pawn_material(self, color):
+        """Whether color has anything besides king and pawns"""
+        base = COLOR_INDEX[color] * 6
+        bitboards = self.bitboards
+        return bool(bitboards[base + KNIGHT] | bitboards[base + BISHOP] | bitboards[base + ROOK] | bitboards[base + QUEEN])
+
+    # Get the piece at a given position
+    def get_piece_at_position(self, position):
+        x, y = position
+        code = self.squares[y * 8 + x]
+        if code is None:
+            return None
+        return BitboardPiece(KIND_NAMES[code % 6], COLOR_NAMES[code // 6], position)
+
+    def _square_attacked(self, sq, by_color, occupied=None):
+        """Check if a square is attacked by the given color index"""
+        if occupied is None:
+            occupied = self.occupied
+        base = by_color * 6
+        bitboards = self.bitboards
+        if PAWN_ATTACKS[by_color ^ 1][sq] & bitboards[base + PAWN]:
+            return True
+        if KNIGHT_ATTACKS[sq] & bitboards[base + KNIGHT]:
+            return True
+        if KING_ATTACKS[sq] & bitboards[base + KING]:
+            return True
+        queens = bitboards[base + QUEEN]
+        diagonal = bitboards[base + BISHOP] | queens
+        if diagonal and bishop_attacks(sq, occupied) & diagonal:
+            return True
+        straight = bitboards[base + ROOK] | queens
+        if straight and rook_attacks(sq, occupied) & straight:
+            return True
+        return False
+
+    def _attackers_to(self, sq, by_color):
+        """Bitboard of the given color's pieces attacking sq"""
+        base = by_color * 6
+        bitboards = self.bitboards
+        queens = bitboards[base + QUEEN]
+        return ((PAWN_ATTACKS[by_color ^ 1][sq] & bitboards[base + PAWN])
+                | (KNIGHT_ATTACKS[sq] & bitboards[base + KNIGHT])
+                | (KING_ATTACKS[sq] & bitboards[base + KING])
+                | (bishop_attacks(sq, self.occupied) & (bitboards[base + BISHOP] | queens))
+                | (rook_attacks(sq, self.occupied) & (bitboards[base + ROOK] | queens)))
+
+    def _king_attacked(self, color):
+        king = self.bitboards[color * 6 + KING]
+        if not king:
+            return False
+        return self._square_attacked(king.bit_length() - 1, color ^ 1)
+
+    def is_in_check(self, king_color):
+        return self._king_attacked(COLOR_INDEX[king_color])
+
+    def is_square_attacked(self, position, by_color):
+        return self._square_attacked(square_of(position), COLOR_INDEX[by_color])
+
+    def _pseudo_targets(self, sq, code):
+        """Bitboard of squares the piece on sq can move to, ignoring checks, castling and en passant"""
+        color = code // 6
+        kind = code % 6
+        own = self.occupancy[color]
+        if kind == PAWN:
+            empty = ~self.occupied
+            bit = 1 << sq
+            if color == WHITE:
+                single = (bit << 8) & empty
+                targets = single
+                if single and sq < 16:
+                    targets |= (single << 8) & empty
+            else:
+                single = (bit >> 8) & empty
+                targets = single
+                if single and sq >= 48:
+                    targets |= (single >> 8) & empty
+            return targets | (PAWN_ATTACKS[color][sq] & self.occupancy[color ^ 1])
+        if kind == KNIGHT:
+            return KNIGHT_ATTACKS[sq] & ~own
+        if kind == BISHOP:
+            return bishop_attacks(sq, self.occupied) & ~own
+        if kind == ROOK:
+            return rook_attacks(sq, self.occupied) & ~own
+        if kind == QUEEN:
+            return (rook_attacks(sq, self.occupied) | bishop_attacks(sq, self.occupied)) & ~own
+        return KING_ATTACKS[sq] & ~own
+
+    def _pseudo_moves_for_position(self, position):
+        sq = square_of(position)
+        code = self.squares[sq]
+        if code is None:
+            return []
+        return [SQUARE_POSITIONS[target] for target in iter_bits(self._pseudo_targets(sq, code))]
+
+    # Checkers, pins and the check evasion mask for one side, worked out once per
+    # position so every piece's moves can be filtered without make/undo
+    def _legal_context(self, color):
+        king = self.bitboards[color * 6 + KING]
+        king_sq = king.bit_length() - 1
+        enemy = color ^ 1
+        checkers = self._attackers_to(king_sq, enemy)
+        if not checkers:
+            evasions = ALL_SQUARES
+        elif checkers & (checkers - 1):
+            evasions = 0  # Double check: only the king may move
+        else:
+            evasions = checkers | BETWEEN[king_sq][checkers.bit_length() - 1]
+
+        pins = {}  # Pinned square -> squares it may still move to
+        base = enemy * 6
+        queens = self.bitboards[base + QUEEN]
+        own = self.occupancy[color]
+        for attacks, sliders in ((rook_attacks, self.bitboards[base + ROOK] | queens),
+                                 (bishop_attacks, self.bitboards[base + BISHOP] | queens)):
+            for pinner in iter_bits(attacks(king_sq, 0) & sliders):
+                blockers = BETWEEN[king_sq][pinner] & self.occupied
+                if blockers and not blockers & (blockers - 1) and blockers & own:
+                    pins[blockers.bit_length() - 1] = BETWEEN[king_sq][pinner] | (1 << pinner)
+        return king_sq, checkers, evasions, pins
+
+    def _legal_targets(self, sq, context):
+        """List of legal destination squares for the piece on sq"""
+        code = self.squares[sq]
+        if code is None:
+            return []
+        color = code // 6
+        kind = code % 6
+        king_sq, checkers, evasions, pins = context
+        targets = self._pseudo_targets(sq, code)
+
+        if kind == KING:
+            # Take the king off the board so sliders see through its current square
+            occupied = self.occupied ^ (1 << sq)
+            legal = [target for target in iter_bits(targets)
+                     if not self._square_attacked(target, color ^ 1, occupied)]
+            if not checkers:
+                legal.extend(self._castling_targets(color, sq))
+            return legal
+
+        targets &= evasions & pins.get(sq, ALL_SQUARES)
+        legal = list(iter_bits(targets))
+
+        # En passant can expose the king along the rank, so play it out. Only the
+        # opponent of the side that pushed may take, as on board.Board
+        ep_square = self.ep_square
+        if (kind == PAWN and ep_square is not None and PAWN_ATTACKS[color][sq] & (1 << ep_square)
+                and self.squares[ep_square - 8 if color == WHITE else ep_square + 8] == (color ^ 1) * 6 + PAWN):
+            undo = self._make(sq, ep_square, QUEEN)
+            if not self._king_attacked(color):
+                legal.append(ep_square)
+            self._unmake(undo)
+        return legal
+
+    def _castling_targets(self, color, king_sq):
+        if color == WHITE:
+            kingside, queenside, home = WHITE_KINGSIDE, WHITE_QUEENSIDE, 4
+        else:
+            kingside, queenside, home = BLACK_KINGSIDE, BLACK_QUEENSIDE, 60
+        if king_sq != home or not self.castling & (kingside | queenside):
+            return []
+        enemy = color ^ 1
+        if self._square_attacked(king_sq, enemy):
+            return []
+        targets = []
+        rook_code = color * 6 + ROOK
+        if (self.castling & kingside and self.squares[home + 3] == rook_code
+                and not self.occupied & (0b11 << (home + 1))
+                and not self._square_attacked(home + 1, enemy)
+                and not self._square_attacked(home + 2, enemy)):
+            targets.append(home + 2)
+        if (self.castling & queenside and self.squares[home - 4] == rook_code
+                and not self.occupied & (0b111 << (home - 3))
+                and not self._square_attacked(home - 1, enemy)
+                and not self._square_attacked(home - 2, enemy)):
+            targets.append(home - 2)
+        return targets
+
+    def get_legal_moves_for_piece(self, piece):
+        if piece is None: return []
+        sq = square_of(piece.position)
+        context = self._legal_context(COLOR_INDEX[piece.color])
+        return [SQUARE_POSITIONS[target] for target in self._legal_targets(sq, context)]
+
+    def generate_legal_moves(self, player_color):
+        """All legal moves for a player as (start_pos, end_pos) pairs"""
+        color = COLOR_INDEX[player_color]
+        context = self._legal_context(color)
+        moves = []
+        for sq in iter_bits(self.occupancy[color]):
+            start_pos = SQUARE_POSITIONS[sq]
+            for target in self._legal_targets(sq, context):
+                moves.append((start_pos, SQUARE_POSITIONS[target]))
+        return moves
+
+    def get_all_legal_moves_for_player(self, player_color):
+        return [end_pos for _, end_pos in self.generate_legal_moves(player_color)]
+
+    def check_game_status(self, player_color):
+        color = COLOR_INDEX[player_color]
+        context = self._legal_context(color)
+        for sq in iter_bits(self.occupancy[color]):
+            if self._legal_targets(sq, context):
+                return None
+        if context[1]:
+            return "checkmate"
+        return "stalemate"
+
+    def _make(self, start, end, promotion):
+        """Play a move and return the data needed to take it back"""
+        squares = self.squares
+        code = squares[start]
+        color = code // 6
+        kind = code % 6
+        captured = squares[end]
+        capture_sq = end
+        rook_move = None
+        promoted = None
+        castling = self.castling
+        ep_square = self.ep_square
+        previous_hash = self._hash
+
+        if kind == PAWN and end == ep_square and captured is None:
+            # En passant capture removes the pawn behind the target square
+            capture_sq = end - 8 if color == WHITE else end + 8
+            captured = squares[capture_sq]
+        if captured is not None:
+            self._remove(captured, capture_sq)
+
+        self._remove(code, start)
+        if kind == PAWN and (end >= 56 or end < 8) and promotion is not None:
+            promoted = color * 6 + promotion
+            self._put(promoted, end)
+        else:
+            self._put(code, end)
+
+        if kind == KING and abs(end - start) == 2:
+            rook_code = color * 6 + ROOK
+            if end > start:
+                rook_move = (start + 3, start + 1)
+            else:
+                rook_move = (start - 4, start - 1)
+            self._remove(rook_code, rook_move[0])
+            self._put(rook_code, rook_move[1])
+
+        key = self._hash ^ BLACK_TO_MOVE_KEY ^ CASTLING_KEYS[castling]
+        if ep_square is not None:
+            key ^= EP_FILE_KEYS[ep_square % 8]
+        if kind == PAWN and abs(end - start) == 16:
+            self.ep_square = (start + end) // 2
+            key ^= EP_FILE_KEYS[end % 8]
+        else:
+            self.ep_square = None
+        self.castling = castling & CASTLING_MASKS[start] & CASTLING_MASKS[end]
+        self._hash = key ^ CASTLING_KEYS[self.castling]
+        self.turn = 'black' if self.turn == 'white' else 'white'
+        return (start, end, code, captured, capture_sq, castling, ep_square, rook_move, promoted, previous_hash)
+
+    def _unmake(self, undo):
+        start, end, code, captured, capture_sq, castling, ep_square, rook_move, promoted, previous_hash = undo
+        if rook_move is not None:
+            rook_code = code - KING + ROOK
+            self._remove(rook_code, rook_move[1])
+            self._put(rook_code, rook_move[0])
+        # The target square may hold a piece promoted later by promote_pawn
+        self._remove(self.squares[end], end)
+        self._put(code, start)
+        if captured is not None:
+            self._put(captured, capture_sq)
+        self.castling = castling
+        self.ep_square = ep_square
+        self._hash = previous_hash
+        self.turn = 'black' if self.turn == 'white' else 'white'
+
+    def make_move(self, start, end, promotion='queen'):
+        """Play a move, pushing what's needed to take it back onto the undo stack"""
+        undo = self._make(square_of(start), square_of(end), PROMOTION_KINDS.get(promotion))
+        captured = undo[3]
+        if captured is not None:
+            color = COLOR_NAMES[captured // 6]
+            self.captured_pieces[color].append(BitboardPiece(KIND_NAMES[captured % 6], color, SQUARE_POSITIONS[undo[4]]))
+        self._undo_stack.append((undo, self.promotion_pending))
+
+    def unmake_move(self):
+        """Take back the last move played with make_move or move_piece"""
+        undo, self.promotion_pending = self._undo_stack.pop()
+        if undo[3] is not None:
+            self.captured_pieces[COLOR_NAMES[undo[3] // 6]].pop()
+        self._unmake(undo)
+
+    def make_null_move(self):
+        """Pass the turn without moving, for null-move pruning in the search"""
+        self._undo_stack.append((self.ep_square, self._hash))
+        self._hash ^= BLACK_TO_MOVE_KEY
+        if self.ep_square is not None:
+            self._hash ^= EP_FILE_KEYS[self.ep_square % 8]
+        self.ep_square = None
+        self.turn = 'black' if self.turn == 'white' else 'white'
+
+    def unmake_null_move(self):
+        """Take back a pass played with make_null_move"""
+        self.ep_square, self._hash = self._undo_stack.pop()
+        self.turn = 'black' if self.turn == 'white' else 'white'
+
+    # Move a piece to a given position
+    def move_piece(self, piece, start, position):
+        # Promotion is left pending for promote_pawn, as on board.Board
+        self.make_move(start, position, promotion=None)
+        moved = self.get_piece_at_position(position)
+        if moved.can_promote():
+            self.promotion_pending = moved
+        if piece is not None:
+            piece.position = position
+        return True
+
+    def promote_pawn(self, pawn, promotion_choice='queen'):
+        """Promote a pawn to the specified piece type"""
+        sq = square_of(pawn.position)
+        code = self.squares[sq]
+        color = code // 6
+        self._remove(code, sq)
+        self._put(color * 6 + PROMOTION_KINDS.get(promotion_choice, QUEEN), sq)
+        return self.get_piece_at_position(pawn.position)
+
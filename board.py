@@ -1,59 +1,423 @@
-import pygame, pieces
+import pieces
+from collections import OrderedDict
 from pieces import King, Pawn, Queen, Rook, Bishop, Knight
+from evaluation import PIECE_SQUARE_VALUES
+from zobrist import PIECE_KEYS, BLACK_TO_MOVE_KEY, CASTLING_KEYS, EP_FILE_KEYS
+
+SLIDING_PIECES = (Rook, Bishop, Queen)
+KING_DIRECTIONS = [(0, 1), (0, -1), (1, 0), (-1, 0), (1, 1), (1, -1), (-1, 1), (-1, -1)]
+
+# Castling rights bit -> (color, king home, rook home), as used by the Zobrist keys
+CASTLING_RIGHTS = [(1, 'white', (4, 0), (7, 0)), (2, 'white', (4, 0), (0, 0)),
+                   (4, 'black', (4, 7), (7, 7)), (8, 'black', (4, 7), (0, 7))]
+CASTLING_SQUARES = {(4, 0), (0, 0), (7, 0), (4, 7), (0, 7), (7, 7)}
+ALL_CASTLING_RIGHTS = 15
+
+# Rights kept when a move starts or ends on a king or rook home square
+CASTLING_MASKS = {}
+for _bit, _color, _king_home, _rook_home in CASTLING_RIGHTS:
+    CASTLING_MASKS[_king_home] = CASTLING_MASKS.get(_king_home, ALL_CASTLING_RIGHTS) & ~_bit
+    CASTLING_MASKS[_rook_home] = CASTLING_MASKS.get(_rook_home, ALL_CASTLING_RIGHTS) & ~_bit
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+FEN_PIECES = {'p': Pawn, 'n': Knight, 'b': Bishop, 'r': Rook, 'q': Queen, 'k': King}
+FEN_LETTERS = {piece_class.kind: letter for letter, piece_class in FEN_PIECES.items()}
+FEN_CASTLING = [(1, 'K'), (2, 'Q'), (4, 'k'), (8, 'q')]
+
+def move_name(start, end, promotion=None):
+    """Coordinate notation for a move, e.g. e2e4 or a7a8q"""
+    name = 'abcdefgh'[start[0]] + str(start[1] + 1) + 'abcdefgh'[end[0]] + str(end[1] + 1)
+    if promotion is not None:
+        name += 'n' if promotion == 'knight' else promotion[0]
+    return name
+
+MOVE_CACHE_SIZE = 4096  # Positions kept in the legal move cache
 
 class Board:
-    def __init__(self):
+    def __init__(self, setup=True):
         self.grid = [[None for _ in range(8)] for _ in range(8)]
-        self.create_pieces()
+        if setup:
+            self.create_pieces()
         self.king_position = {'white': (4, 0), 'black': (4, 7)}
         self.captured_pieces = {'white': [], 'black': []}
         self.last_move = None  # Store (piece, start_pos, end_pos) for en passant
         self.promotion_pending = None  # Store pawn that needs promotion
-        self._move_cache = {}  # Cache for expensive move calculations
-        self._board_hash = None  # Cache board state hash
+        self.turn = 'white'  # Side to move, flipped by every move
+        self.castling_rights = ALL_CASTLING_RIGHTS if setup else 0  # Bitmask, see CASTLING_RIGHTS
+        self.halfmove_clock = 0  # Moves since the last capture or pawn move, for the fifty-move rule
+        self.fullmove_number = 1  # Starts at 1 and goes up after every black move
+        self._undo_stack = []  # One entry per move played, for unmake_move
+        self._move_cache = OrderedDict()  # (position hash, color) -> legal moves and game status, oldest first
+        self.move_cache_size = MOVE_CACHE_SIZE
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._build_attack_maps()
+        self._refresh_hash()
+        self._refresh_material()
 
     # Get the piece at a given position
     def get_piece_at_position(self, position):
         x, y = position
         return self.grid[x][y]
+
+    @classmethod
+    def from_fen(cls, fen):
+        """Build a board from a FEN string"""
+        fields = fen.split()
+        rows = fields[0].split('/') if fields else []
+        if len(fields) < 4 or len(rows) != 8 or fields[1] not in ('w', 'b'):
+            raise ValueError(f"Invalid FEN: {fen!r}")
+
+        board = cls(setup=False)
+        board.king_position = {'white': None, 'black': None}
+        for rank, row in enumerate(rows):
+            y = 7 - rank
+            x = 0
+            for char in row:
+                if char.isdigit():
+                    x += int(char)
+                    continue
+                if char.lower() not in FEN_PIECES or x > 7:
+                    raise ValueError(f"Invalid FEN: {fen!r}")
+                color = 'white' if char.isupper() else 'black'
+                piece = FEN_PIECES[char.lower()](color, (x, y))
+                board.grid[x][y] = piece
+                if isinstance(piece, King):
+                    board.king_position[color] = (x, y)
+                x += 1
+            if x != 8:
+                raise ValueError(f"Invalid FEN: {fen!r}")
+        if None in board.king_position.values():
+            raise ValueError(f"FEN needs a king for each side: {fen!r}")
+
+        board.turn = 'white' if fields[1] == 'w' else 'black'
+
+        # Castling is '-' or each of KQkq at most once
+        if fields[2] != '-' and (set(fields[2]) - set('KQkq') or len(set(fields[2])) != len(fields[2])):
+            raise ValueError(f"Invalid FEN: {fen!r}")
+
+        # Only keep rights whose king and rook are still on their home squares
+        for (bit, char), (_, color, king_home, rook_home) in zip(FEN_CASTLING, CASTLING_RIGHTS):
+            king = board.get_piece_at_position(king_home)
+            rook = board.get_piece_at_position(rook_home)
+            if (char in fields[2] and isinstance(king, King) and king.color == color
+                    and isinstance(rook, Rook) and rook.color == color):
+                board.castling_rights |= bit
+
+        # The en passant square becomes the double step that allowed it, so it sits
+        # behind a pawn of the side that just moved, with the squares it crossed empty
+        if fields[3] != '-':
+            rank = '6' if board.turn == 'white' else '3'
+            if len(fields[3]) != 2 or fields[3][0] not in 'abcdefgh' or fields[3][1] != rank:
+                raise ValueError(f"Invalid FEN: {fen!r}")
+            x = 'abcdefgh'.index(fields[3][0])
+            y = int(rank) - 1
+            step = 1 if board.turn == 'black' else -1
+            pawn = board.get_piece_at_position((x, y + step))
+            if (not isinstance(pawn, Pawn) or pawn.color == board.turn
+                    or board.grid[x][y] is not None or board.grid[x][y - step] is not None):
+                raise ValueError(f"Invalid FEN: {fen!r}")
+            board.last_move = (pawn, (x, y - step), (x, y + step))
+
+        try:
+            board.halfmove_clock = int(fields[4]) if len(fields) > 4 else 0
+            board.fullmove_number = int(fields[5]) if len(fields) > 5 else 1
+        except ValueError:
+            raise ValueError(f"Invalid FEN: {fen!r}")
+
+        board._build_attack_maps()
+        board._refresh_hash()
+        board._refresh_material()
+        return board
+
+    def to_fen(self):
+        """Describe the position as a FEN string"""
+        rows = []
+        for y in range(7, -1, -1):
+            row = ''
+            empty = 0
+            for x in range(8):
+                piece = self.grid[x][y]
+                if piece is None:
+                    empty += 1
+                    continue
+                if empty:
+                    row += str(empty)
+                    empty = 0
+                letter = FEN_LETTERS[piece.kind]
+                row += letter.upper() if piece.color == 'white' else letter
+            if empty:
+                row += str(empty)
+            rows.append(row)
+
+        castling = ''.join(char for bit, char in FEN_CASTLING if self.castling_rights & bit) or '-'
+        en_passant = '-'
+        if self.last_move is not None:
+            last_piece, last_start, last_end = self.last_move
+            if isinstance(last_piece, Pawn) and abs(last_end[1] - last_start[1]) == 2:
+                en_passant = 'abcdefgh'[last_end[0]] + str((last_start[1] + last_end[1]) // 2 + 1)
+
+        return ' '.join(['/'.join(rows), 'w' if self.turn == 'white' else 'b', castling, en_passant,
+                         str(self.halfmove_clock), str(self.fullmove_number)])
+
+    @property
+    def position_hash(self):
+        """Zobrist hash of the position, side to move, castling rights and en passant file"""
+        return self._board_hash
+
+    def _piece_key(self, piece, position):
+        x, y = position
+        return PIECE_KEYS[piece.kind, piece.color][y * 8 + x]
+
+    def _castling_rights_after(self, start, end):
+        """Castling rights left once a move between two squares has been played"""
+        rights = self.castling_rights
+        if start in CASTLING_SQUARES:
+            rights &= CASTLING_MASKS[start]
+        if end in CASTLING_SQUARES:
+            rights &= CASTLING_MASKS[end]
+        return rights
+
+    def _en_passant_key(self):
+        if self.last_move is None:
+            return 0
+        last_piece, last_start, last_end = self.last_move
+        if isinstance(last_piece, Pawn) and abs(last_end[1] - last_start[1]) == 2:
+            return EP_FILE_KEYS[last_end[0]]
+        return 0
+
+    def _refresh_hash(self):
+        """Recompute the Zobrist hash from scratch"""
+        key = 0
+        for x in range(8):
+            for y in range(8):
+                piece = self.grid[x][y]
+                if piece is not None:
+                    key ^= PIECE_KEYS[piece.kind, piece.color][y * 8 + x]
+        if self.turn == 'black':
+            key ^= BLACK_TO_MOVE_KEY
+        self._board_hash = key ^ CASTLING_KEYS[self.castling_rights] ^ self._en_passant_key()
+
+    def _piece_value(self, piece, position):
+        x, y = position
+        return PIECE_SQUARE_VALUES[piece.kind, piece.color][y * 8 + x]
+
+    def _refresh_material(self):
+        """Recompute each side's material and piece-square total and piece count from scratch"""
+        self.psq_totals = {'white': 0, 'black': 0}  # Centipawns, kept up to date by every move
+        self.non_pawn_pieces = {'white': 0, 'black': 0}  # Knights, bishops, rooks and queens
+        for x in range(8):
+            for y in range(8):
+                piece = self.grid[x][y]
+                if piece is not None:
+                    self.psq_totals[piece.color] += PIECE_SQUARE_VALUES[piece.kind, piece.color][y * 8 + x]
+                    if piece.kind not in ('Pawn', 'King'):
+                        self.non_pawn_pieces[piece.color] += 1
+
+    def has_non_pawn_material(self, color):
+        """Whether color has anything besides king and pawns"""
+        return self.non_pawn_pieces[color] > 0
+
+    def psq_score(self, color):
+        """Material and piece-square total of color less the opponent's, in centipawns"""
+        opponent = 'black' if color == 'white' else 'white'
+        return self.psq_totals[color] - self.psq_totals[opponent]
+
+    # Caches and attack maps are rebuilt on load, so pickled boards only carry the position
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in ('_move_cache', 'attack_maps', '_attackers', '_piece_attacks'):
+            del state[name]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._move_cache = OrderedDict()
+        self._build_attack_maps()
     
     def is_in_check(self, king_color):
-        king_pos = self.king_position[king_color]
+        x, y = self.king_position[king_color]
         opponent_color = 'black' if king_color == 'white' else 'white'
-        for x in range(8):
-            for y in range(8):
-                piece = self.get_piece_at_position((x, y))
-                if piece is not None and piece.color == opponent_color:
-                    if king_pos in piece.get_moves():
-                        return True
-        return False
+        return self.attack_maps[opponent_color][x][y] > 0
+
+    def is_square_attacked(self, position, by_color):
+        x, y = position
+        return self.attack_maps[by_color][x][y] > 0
+
+    # Attack maps: per-color count of attackers on every square, kept up to date
+    # by every move so attack queries never have to scan the board
+    def _build_attack_maps(self):
+        self.attack_maps = {'white': [[0] * 8 for _ in range(8)], 'black': [[0] * 8 for _ in range(8)]}
+        self._attackers = [[set() for _ in range(8)] for _ in range(8)]  # Pieces attacking each square
+        self._piece_attacks = {}  # Squares attacked by each piece
+        for row in self.grid:
+            for piece in row:
+                if piece is not None:
+                    self._add_attacks(piece)
+
+    def _add_attacks(self, piece):
+        squares = piece.get_attacks(self)
+        self._piece_attacks[piece] = squares
+        counts = self.attack_maps[piece.color]
+        for x, y in squares:
+            self._attackers[x][y].add(piece)
+            counts[x][y] += 1
+
+    def _remove_attacks(self, piece):
+        squares = self._piece_attacks.pop(piece, None)
+        if squares is None:
+            return
+        counts = self.attack_maps[piece.color]
+        for x, y in squares:
+            self._attackers[x][y].discard(piece)
+            counts[x][y] -= 1
+
+    def _update_attacks(self, changed_squares, moved_pieces, removed_pieces=()):
+        """Refresh attack maps after the grid changed on the given squares"""
+        # Sliders whose rays reach a changed square may now see further or less far
+        affected = set(moved_pieces)
+        for x, y in changed_squares:
+            for attacker in self._attackers[x][y]:
+                if isinstance(attacker, SLIDING_PIECES):
+                    affected.add(attacker)
+        for piece in removed_pieces:
+            self._remove_attacks(piece)
+            affected.discard(piece)
+        for piece in affected:
+            self._remove_attacks(piece)
+            self._add_attacks(piece)
 
     def get_legal_moves_for_piece(self, piece):
-        legal_moves = []
         if piece is None: return []
-        
-        start_pos = piece.position
-        
-        # Get normal moves
-        for end_pos in piece.get_moves():
-            undo_data = self._make_move_for_simulation(piece, start_pos, end_pos)
-            if not self.is_in_check(piece.color):
-                legal_moves.append(end_pos)
-            self._undo_move_for_simulation(undo_data)
-            
-        # Add castling moves for king
-        if isinstance(piece, King) and not piece.has_moved:
-            king_x, king_y = piece.position
-            
-            # Kingside castling
-            rook = self.get_piece_at_position((7, king_y))
-            if isinstance(rook, Rook) and self.can_castle(piece, rook):
-                legal_moves.append((king_x + 2, king_y))
+        entry = self._cached_legal_moves(piece.color)
+        if entry[1] is None:
+            # Group by start square the first time a single piece is asked for
+            moves_by_start = {}
+            for start_pos, end_pos in entry[0]:
+                moves_by_start.setdefault(start_pos, []).append(end_pos)
+            entry[1] = moves_by_start
+        return list(entry[1].get(piece.position, ()))
+
+    def _cached_legal_moves(self, color):
+        """Look up [moves, moves by start square, game status] for a side, generating on a miss"""
+        key = (self._board_hash, color)
+        entry = self._move_cache.get(key)
+        if entry is not None:
+            self._move_cache.move_to_end(key)
+            self.cache_hits += 1
+            return entry
+
+        self.cache_misses += 1
+        moves = self._generate_legal_moves(color)
+        if moves:
+            status = None
+        elif self.is_in_check(color):
+            status = "checkmate"
+        else:
+            status = "stalemate"
+
+        entry = [moves, None, status]
+        self._move_cache[key] = entry
+        if len(self._move_cache) > self.move_cache_size:
+            self._move_cache.popitem(last=False)
+        return entry
+
+    def move_cache_stats(self):
+        """Size, capacity and hit/miss counters of the legal move cache"""
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            'size': len(self._move_cache),
+            'capacity': self.move_cache_size,
+            'hits': self.cache_hits,
+            'misses': self.cache_misses,
+            'hit_rate': self.cache_hits / lookups if lookups else 0.0,
+        }
+
+    # Checkers, pins and the check evasion mask for one side, worked out once per
+    # position so every piece's moves can be filtered without make/undo
+    def _legal_move_context(self, color):
+        king_x, king_y = self.king_position[color]
+        opponent_color = 'black' if color == 'white' else 'white'
+        checkers = [piece for piece in self._attackers[king_x][king_y] if piece.color == opponent_color]
+
+        evasions = None  # Squares that resolve a single check
+        king_xray = set()  # Squares behind the king on a checking slider's line
+        for checker in checkers:
+            checker_x, checker_y = checker.position
+            if isinstance(checker, SLIDING_PIECES):
+                dx = (king_x > checker_x) - (king_x < checker_x)
+                dy = (king_y > checker_y) - (king_y < checker_y)
+                king_xray.add((king_x + dx, king_y + dy))
+        if len(checkers) == 1:
+            checker = checkers[0]
+            evasions = {checker.position}
+            if isinstance(checker, SLIDING_PIECES):
+                evasions.update(self._squares_between(checker.position, (king_x, king_y)))
+
+        pins = {}  # Pinned piece -> squares it may still move to
+        for dx, dy in KING_DIRECTIONS:
+            ray = []
+            pinned = None
+            x, y = king_x + dx, king_y + dy
+            while 0 <= x < 8 and 0 <= y < 8:
+                ray.append((x, y))
+                piece = self.grid[x][y]
+                if piece is not None:
+                    if pinned is not None:
+                        pinner_types = (Rook, Queen) if dx == 0 or dy == 0 else (Bishop, Queen)
+                        if piece.color == opponent_color and isinstance(piece, pinner_types):
+                            pins[pinned] = set(ray)
+                        break
+                    if piece.color == opponent_color:
+                        break
+                    pinned = piece
+                x, y = x + dx, y + dy
+
+        return checkers, evasions, king_xray, pins
+
+    def _squares_between(self, start, end):
+        dx = (end[0] > start[0]) - (end[0] < start[0])
+        dy = (end[1] > start[1]) - (end[1] < start[1])
+        squares = []
+        x, y = start[0] + dx, start[1] + dy
+        while (x, y) != end:
+            squares.append((x, y))
+            x, y = x + dx, y + dy
+        return squares
+
+    def _legal_moves_in_context(self, piece, context):
+        checkers, evasions, king_xray, pins = context
+
+        if isinstance(piece, King):
+            opponent_map = self.attack_maps['black' if piece.color == 'white' else 'white']
+            legal_moves = [end_pos for end_pos in piece.get_moves(self)
+                           if opponent_map[end_pos[0]][end_pos[1]] == 0 and end_pos not in king_xray]
+
+            # Add castling moves for king
+            if not checkers and self.castling_rights & (3 if piece.color == 'white' else 12):
+                king_x, king_y = piece.position
                 
-            # Queenside castling  
-            rook = self.get_piece_at_position((0, king_y))
-            if isinstance(rook, Rook) and self.can_castle(piece, rook):
-                legal_moves.append((king_x - 2, king_y))
+                # Kingside castling
+                rook = self.get_piece_at_position((7, king_y))
+                if isinstance(rook, Rook) and self.can_castle(piece, rook):
+                    legal_moves.append((king_x + 2, king_y))
+                    
+                # Queenside castling  
+                rook = self.get_piece_at_position((0, king_y))
+                if isinstance(rook, Rook) and self.can_castle(piece, rook):
+                    legal_moves.append((king_x - 2, king_y))
+            return legal_moves
+
+        # Only the king can answer a double check
+        if len(checkers) > 1:
+            return []
+
+        legal_moves = piece.get_moves(self)
+        allowed = pins.get(piece)
+        if allowed is not None:
+            legal_moves = [end_pos for end_pos in legal_moves if end_pos in allowed]
+        if evasions is not None:
+            legal_moves = [end_pos for end_pos in legal_moves if end_pos in evasions]
         
         # Add en passant moves for pawn
         if isinstance(piece, Pawn):
@@ -64,205 +428,287 @@ class Board:
             for dx in [-1, 1]:
                 target_pos = (pawn_x + dx, pawn_y + direction)
                 if 0 <= target_pos[0] < 8 and 0 <= target_pos[1] < 8:
-                    if self.can_en_passant(piece, target_pos):
+                    if self.can_en_passant(piece, target_pos) and self._en_passant_is_safe(piece, target_pos):
                         legal_moves.append(target_pos)
         
         return legal_moves
 
+    def _en_passant_is_safe(self, pawn, target_pos):
+        """Play an en passant capture out to see whether it leaves the king in check"""
+        # Removing two pawns from one rank can expose the king in ways pins don't cover
+        self.make_move(pawn.position, target_pos)
+        safe = not self.is_in_check(pawn.color)
+        self.unmake_move()
+        return safe
+
     def get_all_legal_moves_for_player(self, player_color):
-        all_legal_moves = []
+        return [end_pos for _, end_pos in self._cached_legal_moves(player_color)[0]]
+
+    def generate_legal_moves(self, player_color):
+        """All legal moves for a player as (start_pos, end_pos) pairs"""
+        return list(self._cached_legal_moves(player_color)[0])
+
+    def _generate_legal_moves(self, player_color):
+        context = self._legal_move_context(player_color)
+        moves = []
         for x in range(8):
             for y in range(8):
-                piece = self.get_piece_at_position((x,y))
+                piece = self.grid[x][y]
                 if piece is not None and piece.color == player_color:
-                    legal_moves_for_piece = self.get_legal_moves_for_piece(piece)
-                    if legal_moves_for_piece:
-                        all_legal_moves.extend(legal_moves_for_piece)
-        return all_legal_moves
+                    start_pos = (x, y)
+                    for end_pos in self._legal_moves_in_context(piece, context):
+                        moves.append((start_pos, end_pos))
+        return moves
 
     def check_game_status(self, player_color):
-        if not self.get_all_legal_moves_for_player(player_color):
-            if self.is_in_check(player_color):
-                return "checkmate"
-            else:
-                return "stalemate"
-        return None
+        return self._cached_legal_moves(player_color)[2]
 
     # Move a piece to a given position
     def move_piece(self, piece, start, position):
-        captured_piece = self.get_piece_at_position(position)
+        # Promotion is left pending until the player picks a piece
+        self.make_move(start, position, promotion=None)
+        return True
+
+    def make_move(self, start, end, promotion='queen'):
+        """Play a move, pushing everything needed to take it back onto the undo stack"""
+        piece = self.grid[start[0]][start[1]]
+        captured_piece = self.grid[end[0]][end[1]]
+        capture_pos = end
+        rook_move = None
+        changed_squares = [start, end]
+        moved_pieces = [piece]
+        removed_pieces = []
+        undo = [piece, start, end, None, end, None, self.last_move, self.castling_rights,
+                self._board_hash, self.promotion_pending, self.halfmove_clock, self.fullmove_number]
+        key = self._board_hash ^ CASTLING_KEYS[self.castling_rights] ^ self._en_passant_key()
+        totals = self.psq_totals
         
         # Handle en passant capture
-        if isinstance(piece, Pawn) and captured_piece is None and start[0] != position[0]:
+        if isinstance(piece, Pawn) and captured_piece is None and start[0] != end[0]:
             # This is an en passant capture
-            enemy_pawn_pos = (position[0], start[1])
-            enemy_pawn = self.get_piece_at_position(enemy_pawn_pos)
-            if enemy_pawn:
-                self.captured_pieces[enemy_pawn.color].append(enemy_pawn)
-                self.grid[enemy_pawn_pos[0]][enemy_pawn_pos[1]] = None
-        
-        # Handle castling
-        if isinstance(piece, King) and abs(position[0] - start[0]) == 2:
-            # This is a castling move
-            king_x, king_y = start
-            new_king_x, new_king_y = position
-            
-            if new_king_x > king_x:  # Kingside castling
-                rook = self.get_piece_at_position((7, king_y))
-                rook.move((new_king_x - 1, new_king_y))
-                self.grid[new_king_x - 1][new_king_y] = rook
-                self.grid[7][king_y] = None
-            else:  # Queenside castling
-                rook = self.get_piece_at_position((0, king_y))
-                rook.move((new_king_x + 1, new_king_y))
-                self.grid[new_king_x + 1][new_king_y] = rook
-                self.grid[0][king_y] = None
+            capture_pos = (end[0], start[1])
+            captured_piece = self.get_piece_at_position(capture_pos)
+            if captured_piece:
+                self.grid[capture_pos[0]][capture_pos[1]] = None
+                changed_squares.append(capture_pos)
         
         # Normal capture
         if captured_piece:
             self.captured_pieces[captured_piece.color].append(captured_piece)
+            removed_pieces.append(captured_piece)
+            key ^= self._piece_key(captured_piece, capture_pos)
+            totals[captured_piece.color] -= self._piece_value(captured_piece, capture_pos)
+            if not isinstance(captured_piece, Pawn):
+                self.non_pawn_pieces[captured_piece.color] -= 1
+            undo[3] = captured_piece
+            undo[4] = capture_pos
+        
+        # Handle castling
+        if isinstance(piece, King) and abs(end[0] - start[0]) == 2:
+            # This is a castling move
+            king_y = start[1]
+            if end[0] > start[0]:  # Kingside castling
+                rook_start, rook_end = (7, king_y), (end[0] - 1, king_y)
+            else:  # Queenside castling
+                rook_start, rook_end = (0, king_y), (end[0] + 1, king_y)
+            rook = self.get_piece_at_position(rook_start)
+            rook.move(rook_end)
+            self.grid[rook_end[0]][rook_end[1]] = rook
+            self.grid[rook_start[0]][rook_start[1]] = None
+            changed_squares.extend([rook_start, rook_end])
+            moved_pieces.append(rook)
+            key ^= self._piece_key(rook, rook_start) ^ self._piece_key(rook, rook_end)
+            totals[rook.color] += self._piece_value(rook, rook_end) - self._piece_value(rook, rook_start)
+            undo[5] = (rook, rook_start, rook_end)
 
         # Move the piece
-        piece.move(position)
-        x, y = position
-        self.grid[x][y] = piece
-        x, y = start
-        self.grid[x][y] = None
+        piece.move(end)
+        self.grid[end[0]][end[1]] = piece
+        self.grid[start[0]][start[1]] = None
+        key ^= self._piece_key(piece, start) ^ self._piece_key(piece, end)
+        totals[piece.color] += self._piece_value(piece, end) - self._piece_value(piece, start)
         
         # Update king position
         if isinstance(piece, King):
-            self.king_position[piece.color] = position
+            self.king_position[piece.color] = end
             
         # Check for pawn promotion
         if isinstance(piece, Pawn) and piece.can_promote():
-            self.promotion_pending = piece
+            if promotion is None:
+                self.promotion_pending = piece
+            else:
+                new_piece = self._promoted_piece(piece.color, end, promotion)
+                self.grid[end[0]][end[1]] = new_piece
+                moved_pieces.append(new_piece)
+                removed_pieces.append(piece)
+                key ^= self._piece_key(piece, end) ^ self._piece_key(new_piece, end)
+                totals[piece.color] += self._piece_value(new_piece, end) - self._piece_value(piece, end)
+                self.non_pawn_pieces[piece.color] += 1
+
+        self._update_attacks(changed_squares, moved_pieces, removed_pieces)
             
         # Store last move for en passant
-        self.last_move = (piece, start, position)
-        
-        return True
+        self.last_move = (piece, start, end)
 
-    def _make_move_for_simulation(self, piece, start, end):
-        captured_piece = self.get_piece_at_position(end)
-        was_pawn_first_move = isinstance(piece, Pawn) and piece.first_move
-        
-        # Update grid and piece state for the simulation
-        piece.position = end
-        if was_pawn_first_move:
-            piece.first_move = False
+        # Captures and pawn moves reset the fifty-move count
+        if captured_piece or isinstance(piece, Pawn):
+            self.halfmove_clock = 0
+        else:
+            self.halfmove_clock += 1
+        if piece.color == 'black':
+            self.fullmove_number += 1
 
-        self.grid[end[0]][end[1]] = piece
-        self.grid[start[0]][start[1]] = None
-        if isinstance(piece, King):
-            self.king_position[piece.color] = end
-        
-        return (piece, start, end, captured_piece, was_pawn_first_move)
+        # Update the hash for side to move, castling rights and en passant file
+        self.turn = 'black' if self.turn == 'white' else 'white'
+        self.castling_rights = self._castling_rights_after(start, end)
+        self._board_hash = key ^ BLACK_TO_MOVE_KEY ^ CASTLING_KEYS[self.castling_rights] ^ self._en_passant_key()
+        self._undo_stack.append(undo)
 
-    def _undo_move_for_simulation(self, undo_data):
-        piece, start, end, captured_piece, was_pawn_first_move = undo_data
-        
-        # Restore grid and piece state
-        piece.position = start
-        if was_pawn_first_move:
-            piece.first_move = True
+    def unmake_move(self):
+        """Take back the last move played with make_move or move_piece"""
+        (piece, start, end, captured_piece, capture_pos, rook_move, last_move, castling_rights,
+         board_hash, promotion_pending, halfmove_clock, fullmove_number) = self._undo_stack.pop()
+        changed_squares = [start, end]
+        moved_pieces = [piece]
+        removed_pieces = []
 
+        # Whatever stands on the target square now may be a promoted piece
+        current = self.grid[end[0]][end[1]]
+        if current is not piece:
+            removed_pieces.append(current)
+            self.non_pawn_pieces[piece.color] -= 1
+        totals = self.psq_totals
+        totals[piece.color] += self._piece_value(piece, start) - self._piece_value(current, end)
+        self.grid[end[0]][end[1]] = None
+        piece.move(start)
         self.grid[start[0]][start[1]] = piece
-        self.grid[end[0]][end[1]] = captured_piece
-        
         if isinstance(piece, King):
             self.king_position[piece.color] = start
-        
+
+        if rook_move is not None:
+            rook, rook_start, rook_end = rook_move
+            rook.move(rook_start)
+            self.grid[rook_end[0]][rook_end[1]] = None
+            self.grid[rook_start[0]][rook_start[1]] = rook
+            changed_squares.extend([rook_start, rook_end])
+            moved_pieces.append(rook)
+            totals[rook.color] += self._piece_value(rook, rook_start) - self._piece_value(rook, rook_end)
+
+        if captured_piece is not None:
+            self.captured_pieces[captured_piece.color].pop()
+            self.grid[capture_pos[0]][capture_pos[1]] = captured_piece
+            totals[captured_piece.color] += self._piece_value(captured_piece, capture_pos)
+            if not isinstance(captured_piece, Pawn):
+                self.non_pawn_pieces[captured_piece.color] += 1
+            changed_squares.append(capture_pos)
+            moved_pieces.append(captured_piece)
+
+        self._update_attacks(changed_squares, moved_pieces, removed_pieces)
+        self.last_move = last_move
+        self.castling_rights = castling_rights
+        self._board_hash = board_hash
+        self.promotion_pending = promotion_pending
+        self.halfmove_clock = halfmove_clock
+        self.fullmove_number = fullmove_number
+        self.turn = 'black' if self.turn == 'white' else 'white'
+
+    def make_null_move(self):
+        """Pass the turn without moving, for null-move pruning in the search"""
+        self._undo_stack.append((self.last_move, self._board_hash, self.halfmove_clock))
+        self._board_hash ^= BLACK_TO_MOVE_KEY ^ self._en_passant_key()
+        self.last_move = None
+        self.halfmove_clock += 1
+        self.turn = 'black' if self.turn == 'white' else 'white'
+
+    def unmake_null_move(self):
+        """Take back a pass played with make_null_move"""
+        self.last_move, self._board_hash, self.halfmove_clock = self._undo_stack.pop()
+        self.turn = 'black' if self.turn == 'white' else 'white'
+
     # Create the pieces
     def create_pieces(self):
         # White pawns
         for x in range(8):
-            self.grid[x][1] = pieces.Pawn('white', (x, 1), self.get_piece_at_position)
+            self.grid[x][1] = pieces.Pawn('white', (x, 1))
         # Black pawns
         for x in range(8):
-            self.grid[x][6] = pieces.Pawn('black', (x, 6), self.get_piece_at_position)
+            self.grid[x][6] = pieces.Pawn('black', (x, 6))
         # White rooks
-        self.grid[0][0] = pieces.Rook('white', (0, 0), self.get_piece_at_position)
-        self.grid[7][0] = pieces.Rook('white', (7, 0), self.get_piece_at_position)
+        self.grid[0][0] = pieces.Rook('white', (0, 0))
+        self.grid[7][0] = pieces.Rook('white', (7, 0))
         # Black rooks
-        self.grid[0][7] = pieces.Rook('black', (0, 7), self.get_piece_at_position)
-        self.grid[7][7] = pieces.Rook('black', (7, 7), self.get_piece_at_position)
+        self.grid[0][7] = pieces.Rook('black', (0, 7))
+        self.grid[7][7] = pieces.Rook('black', (7, 7))
         # White bishops
-        self.grid[2][0] = pieces.Bishop('white', (2, 0), self.get_piece_at_position)
-        self.grid[5][0] = pieces.Bishop('white', (5, 0), self.get_piece_at_position)
+        self.grid[2][0] = pieces.Bishop('white', (2, 0))
+        self.grid[5][0] = pieces.Bishop('white', (5, 0))
         # Black bishops
-        self.grid[2][7] = pieces.Bishop('black', (2, 7), self.get_piece_at_position)
-        self.grid[5][7] = pieces.Bishop('black', (5, 7), self.get_piece_at_position)
+        self.grid[2][7] = pieces.Bishop('black', (2, 7))
+        self.grid[5][7] = pieces.Bishop('black', (5, 7))
         # White knights
-        self.grid[1][0] = pieces.Knight('white', (1, 0), self.get_piece_at_position)
-        self.grid[6][0] = pieces.Knight('white', (6, 0), self.get_piece_at_position)
+        self.grid[1][0] = pieces.Knight('white', (1, 0))
+        self.grid[6][0] = pieces.Knight('white', (6, 0))
         # Black knights
-        self.grid[1][7] = pieces.Knight('black', (1, 7), self.get_piece_at_position)
-        self.grid[6][7] = pieces.Knight('black', (6, 7), self.get_piece_at_position)
+        self.grid[1][7] = pieces.Knight('black', (1, 7))
+        self.grid[6][7] = pieces.Knight('black', (6, 7))
         # White queen
-        self.grid[3][0] = pieces.Queen('white', (3, 0), self.get_piece_at_position)
+        self.grid[3][0] = pieces.Queen('white', (3, 0))
         # Black queen
-        self.grid[3][7] = pieces.Queen('black', (3, 7), self.get_piece_at_position)
+        self.grid[3][7] = pieces.Queen('black', (3, 7))
         # White king
-        self.grid[4][0] = pieces.King('white', (4, 0), self.get_piece_at_position)
+        self.grid[4][0] = pieces.King('white', (4, 0))
         # Black king
-        self.grid[4][7] = pieces.King('black', (4, 7), self.get_piece_at_position)
-
-    # Draw the board
-    def draw(self, surface, selected_piece=None, legal_moves=[], hint_move=None):
-        # Classic color scheme
-        colors = [(238, 238, 210), (118, 150, 86)] # Off-white and dark green
-        highlight_color = (246, 246, 130) # Yellow for legal moves
-        selected_color = (186, 202, 68) # Lighter green for selected piece
-        hint_color = (255, 165, 0) # Orange for hint moves
-        
-        for y in range(8):
-            for x in range(8):
-                color = colors[(x + y) % 2]
-                
-                if selected_piece is not None:
-                    if selected_piece.position == (x,y):
-                        color = selected_color
-                    elif (x, y) in legal_moves:
-                        color = highlight_color
-                
-                # Highlight hint move
-                if hint_move and ((x, y) == hint_move[0] or (x, y) == hint_move[1]):
-                    color = hint_color
-                        
-                pygame.draw.rect(surface, color, (x*50, y*50, 50, 50))
-                piece = self.grid[x][y]
-                if piece is not None:
-                    piece.draw(surface, piece.image)
+        self.grid[4][7] = pieces.King('black', (4, 7))
 
     def copy(self):
-        new_board = Board()
-        new_board.grid = [[piece.copy(new_board.get_piece_at_position) if piece is not None else None for piece in row] for row in self.grid]
+        new_board = Board(setup=False)
+        new_board.grid = [[piece.copy() if piece is not None else None for piece in row] for row in self.grid]
         new_board.king_position = self.king_position.copy()
         new_board.captured_pieces = {color: list(pieces) for color, pieces in self.captured_pieces.items()}
+        if self.last_move is not None:
+            last_piece, last_start, last_end = self.last_move
+            new_board.last_move = (new_board.get_piece_at_position(last_end) or last_piece, last_start, last_end)
+        new_board.turn = self.turn
+        new_board.castling_rights = self.castling_rights
+        new_board.halfmove_clock = self.halfmove_clock
+        new_board.fullmove_number = self.fullmove_number
+        new_board._build_attack_maps()
+        new_board._refresh_hash()
+        new_board.psq_totals = self.psq_totals.copy()
+        new_board.non_pawn_pieces = self.non_pawn_pieces.copy()
         return new_board
 
     def promote_pawn(self, pawn, promotion_choice='queen'):
         """Promote a pawn to the specified piece type"""
         x, y = pawn.position
-        color = pawn.color
-        
+        new_piece = self._promoted_piece(pawn.color, (x, y), promotion_choice)
+        self.grid[x][y] = new_piece
+        self._update_attacks([(x, y)], [new_piece], [pawn])
+        self._board_hash ^= self._piece_key(pawn, (x, y)) ^ self._piece_key(new_piece, (x, y))
+        self.psq_totals[pawn.color] += self._piece_value(new_piece, (x, y)) - self._piece_value(pawn, (x, y))
+        self.non_pawn_pieces[pawn.color] += 1
+        return new_piece
+
+    def _promoted_piece(self, color, position, promotion_choice):
         if promotion_choice == 'queen':
-            new_piece = Queen(color, (x, y), self.get_piece_at_position)
+            return Queen(color, position)
         elif promotion_choice == 'rook':
-            new_piece = Rook(color, (x, y), self.get_piece_at_position)
+            return Rook(color, position)
         elif promotion_choice == 'bishop':
-            new_piece = Bishop(color, (x, y), self.get_piece_at_position)
+            return Bishop(color, position)
         elif promotion_choice == 'knight':
-            new_piece = Knight(color, (x, y), self.get_piece_at_position)
-        else:
-            new_piece = Queen(color, (x, y), self.get_piece_at_position)  # Default to queen
-            
-        self.grid[x][y] = new_piece
-        return new_piece
+            return Knight(color, position)
+        return Queen(color, position)  # Default to queen
 
     def can_castle(self, king, rook):
         """Check if castling is possible between king and rook"""
-        if king.has_moved or rook.has_moved:
+        # Both pieces must still be on their home squares with the right intact
+        for bit, color, king_home, rook_home in CASTLING_RIGHTS:
+            if king.position == king_home and rook.position == rook_home and color == king.color:
+                if not self.castling_rights & bit:
+                    return False
+                break
+        else:
             return False
             
         # Check if squares between king and rook are empty
@@ -295,13 +741,7 @@ class Board:
     def _is_square_under_attack(self, position, king_color):
         """Check if a square is under attack by the opposing color"""
         opponent_color = 'black' if king_color == 'white' else 'white'
-        for x in range(8):
-            for y in range(8):
-                piece = self.get_piece_at_position((x, y))
-                if piece is not None and piece.color == opponent_color:
-                    if position in piece.get_moves():
-                        return True
-        return False
+        return self.is_square_attacked(position, opponent_color)
 
     def can_en_passant(self, pawn, target_pos):
         """Check if en passant capture is possible"""
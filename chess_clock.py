@@ -0,0 +1,70 @@
+import time
+
+# Game clock, kept free of pygame so engines and tools can read it too
+class ChessClock:
+    def __init__(self, time_control=None):
+        self.time_control = time_control
+        if time_control == "blitz_3":
+            self.white_time = self.black_time = 180  # 3 minutes in seconds
+        elif time_control == "blitz_5":
+            self.white_time = self.black_time = 300  # 5 minutes
+        elif time_control == "rapid_10":
+            self.white_time = self.black_time = 600  # 10 minutes
+        else:
+            self.white_time = self.black_time = None  # Untimed
+            
+        self.last_update = time.monotonic()
+        self.active_player = None
+        
+    def start_turn(self, player_color):
+        self.active_player = player_color
+        self.last_update = time.monotonic()
+        
+    def end_turn(self):
+        if self.active_player and self.time_control:
+            current_time = time.monotonic()
+            elapsed = current_time - self.last_update
+            
+            if self.active_player == 'white':
+                self.white_time = max(0, self.white_time - elapsed)
+            else:
+                self.black_time = max(0, self.black_time - elapsed)
+                
+        self.active_player = None
+        
+    def update(self):
+        if self.active_player and self.time_control:
+            current_time = time.monotonic()
+            elapsed = current_time - self.last_update
+            
+            if self.active_player == 'white':
+                self.white_time = max(0, self.white_time - elapsed)
+            else:
+                self.black_time = max(0, self.black_time - elapsed)
+                
+            self.last_update = current_time
+            
+    def remaining_time(self, player_color):
+        """Seconds a player has left, counting the turn in progress, or None when untimed"""
+        if not self.time_control:
+            return None
+        time_left = self.white_time if player_color == 'white' else self.black_time
+        if time_left is not None and player_color == self.active_player:
+            time_left = max(0, time_left - (time.monotonic() - self.last_update))
+        return time_left
+
+    def is_time_up(self, player_color):
+        if not self.time_control:
+            return False
+        time_left = self.white_time if player_color == 'white' else self.black_time
+        return time_left is not None and time_left <= 0
+        
+    def get_time_string(self, player_color):
+        if not self.time_control:
+            return "∞"
+        time_left = self.white_time if player_color == 'white' else self.black_time
+        if time_left is None:
+            return "∞"
+        minutes = int(time_left // 60)
+        seconds = int(time_left % 60)
+        return f"{minutes:02d}:{seconds:02d}"
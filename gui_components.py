@@ -1,4 +1,5 @@
 import pygame
+import sprites
 
 class Button:
     def __init__(self, x, y, width, height, text, font, color, hover_color, text_color=(255, 255, 255)):
@@ -98,4 +99,31 @@ class PromotionDialog:
             if button.handle_event(event):
                 self.selected_piece = piece_type
                 return piece_type
-        return None 
\ No newline at end of file
+        return None
+
+# Draw the board
+def draw_board(surface, chess_board, selected_piece=None, legal_moves=[], hint_move=None):
+    # Classic color scheme
+    colors = [(238, 238, 210), (118, 150, 86)] # Off-white and dark green
+    highlight_color = (246, 246, 130) # Yellow for legal moves
+    selected_color = (186, 202, 68) # Lighter green for selected piece
+    hint_color = (255, 165, 0) # Orange for hint moves
+    
+    for y in range(8):
+        for x in range(8):
+            color = colors[(x + y) % 2]
+            
+            if selected_piece is not None:
+                if selected_piece.position == (x,y):
+                    color = selected_color
+                elif (x, y) in legal_moves:
+                    color = highlight_color
+            
+            # Highlight hint move
+            if hint_move and ((x, y) == hint_move[0] or (x, y) == hint_move[1]):
+                color = hint_color
+                    
+            pygame.draw.rect(surface, color, (x*50, y*50, 50, 50))
+            piece = chess_board.get_piece_at_position((x, y))
+            if piece is not None:
+                surface.blit(sprites.get_piece_image(piece.kind, piece.color), ((x*50)+10, (y*50)+5))
@@ -1,11 +1,19 @@
-import pygame, main_menu, board
-from ai import RandomAI, MinimaxAI, AlphaBetaAI, ExpertAI, AggressiveAI, DefensiveAI
-from gui_components import Button, PromotionDialog
+import sys
+import pygame, main_menu, board, sprites
+from ai import RandomAI, MinimaxAI, AlphaBetaAI, ExpertAI, AggressiveAI, DefensiveAI, MATE_SCORE, MATE_THRESHOLD
+from ai_worker import AIWorker
+from search_request import SearchRequest
+from gui_components import Button, PromotionDialog, draw_board
+from chess_clock import ChessClock
 
 # Initialize the game engine
 pygame.init()
 pygame.mixer.init()
 
+# AI searches run on a background thread; a short switch interval hands the
+# interpreter back to the drawing loop quickly so frames keep coming on time
+sys.setswitchinterval(0.001)
+
 # --- Constants and Setup ---
 # Screen dimensions
 BOARD_SIZE = 400
@@ -36,6 +44,9 @@ except:
     ui_font = pygame.font.SysFont(None, 24)
     capture_font = pygame.font.SysFont(None, 22)
 
+HINT_MAX_DEPTH = 5  # Hints keep deepening in the background up to this depth
+HINT_LINES = 3  # Candidate moves listed in the panel while hints are shown
+
 # UI Elements
 PANEL_X = BOARD_SIZE + 20
 surrender_button = Button(BOARD_SIZE + 25, HEIGHT - 120, (PANEL_SIZE - 50) // 2 - 5, 40, "Surrender", ui_font, (180, 70, 70), (237, 100, 100))
@@ -130,66 +141,10 @@ class SoundManager:
 # Initialize sound manager
 sound_manager = SoundManager()
 
-class ChessClock:
-    def __init__(self, time_control=None):
-        self.time_control = time_control
-        if time_control == "blitz_3":
-            self.white_time = self.black_time = 180  # 3 minutes in seconds
-        elif time_control == "blitz_5":
-            self.white_time = self.black_time = 300  # 5 minutes
-        elif time_control == "rapid_10":
-            self.white_time = self.black_time = 600  # 10 minutes
-        else:
-            self.white_time = self.black_time = None  # Untimed
-            
-        self.last_update = pygame.time.get_ticks()
-        self.active_player = None
-        
-    def start_turn(self, player_color):
-        self.active_player = player_color
-        self.last_update = pygame.time.get_ticks()
-        
-    def end_turn(self):
-        if self.active_player and self.time_control:
-            current_time = pygame.time.get_ticks()
-            elapsed = (current_time - self.last_update) / 1000.0
-            
-            if self.active_player == 'white':
-                self.white_time = max(0, self.white_time - elapsed)
-            else:
-                self.black_time = max(0, self.black_time - elapsed)
-                
-        self.active_player = None
-        
-    def update(self):
-        if self.active_player and self.time_control:
-            current_time = pygame.time.get_ticks()
-            elapsed = (current_time - self.last_update) / 1000.0
-            
-            if self.active_player == 'white':
-                self.white_time = max(0, self.white_time - elapsed)
-            else:
-                self.black_time = max(0, self.black_time - elapsed)
-                
-            self.last_update = current_time
-            
-    def is_time_up(self, player_color):
-        if not self.time_control:
-            return False
-        time_left = self.white_time if player_color == 'white' else self.black_time
-        return time_left is not None and time_left <= 0
-        
-    def get_time_string(self, player_color):
-        if not self.time_control:
-            return "∞"
-        time_left = self.white_time if player_color == 'white' else self.black_time
-        if time_left is None:
-            return "∞"
-        minutes = int(time_left // 60)
-        seconds = int(time_left % 60)
-        return f"{minutes:02d}:{seconds:02d}"
-
-def draw_panel(surface, current_player, is_in_check, captured_white, captured_black, chess_clock=None):
+# Decode all piece images once, before the first frame
+sprites.load_piece_images()
+
+def draw_panel(surface, current_player, is_in_check, captured_white, captured_black, chess_clock=None, hint_lines=None):
     """Draws the UI panel on the right side of the screen."""
     panel_rect = pygame.Rect(BOARD_SIZE, 0, PANEL_SIZE, HEIGHT)
     pygame.draw.rect(surface, PANEL_COLOR, panel_rect)
@@ -229,10 +184,19 @@ def draw_panel(surface, current_player, is_in_check, captured_white, captured_bl
         
         for i, piece in enumerate(pieces):
             # Draw smaller images for captured pieces
-            img = pygame.transform.scale(piece.image, (20, 25))
+            img = sprites.get_piece_image(piece.kind, piece.color, (20, 25))
             surface.blit(img, (PANEL_X + (i % 8) * 25, y_offset + 30 + (i // 8) * 30))
-        y_offset += 150 # Increased spacing
-        
+        y_offset += 100 if hint_lines else 150 # Increased spacing, tighter when candidates need the room
+
+    # Ranked candidate moves from the hint search
+    if hint_lines:
+        candidates_surf = ui_font.render("Candidates:", True, TEXT_COLOR)
+        surface.blit(candidates_surf, (PANEL_X, y_offset))
+        for rank, line in enumerate(hint_lines, 1):
+            line_text = f"{rank}. {board.move_name(*line['move'])}  {format_score(line['score'])}"
+            line_surf = capture_font.render(line_text, True, TEXT_COLOR)
+            surface.blit(line_surf, (PANEL_X + 10, y_offset + 25 + (rank - 1) * 20))
+
     # Draw surrender and hint buttons
     surrender_button.draw(surface)
     hint_button.draw(surface)
@@ -264,7 +228,7 @@ def animate_move(piece, start_pos_board, end_pos_board, real_board_state, chess_
         screen.fill(BACKGROUND_COLOR)
         
         # Draw the board state (without the moving piece)
-        real_board_state.draw(surface=temp_board_surface, hint_move=None)
+        draw_board(temp_board_surface, real_board_state, hint_move=None)
         screen.blit(temp_board_surface, (0, board_y_offset))
         
         # Draw the UI panel
@@ -272,7 +236,7 @@ def animate_move(piece, start_pos_board, end_pos_board, real_board_state, chess_
         draw_panel(screen, moving_piece_data.color, is_in_check, real_board_state.captured_pieces['white'], real_board_state.captured_pieces['black'], chess_clock)
         
         # Draw the floating piece
-        screen.blit(moving_piece_data.image, (current_x + 10, current_y + board_y_offset + 5))
+        screen.blit(sprites.get_piece_image(moving_piece_data.kind, moving_piece_data.color), (current_x + 10, current_y + board_y_offset + 5))
         
         pygame.display.flip()
         clock.tick(60)
@@ -297,7 +261,13 @@ def main_loop():
      legal_moves_for_selected_piece = []
      promotion_dialog = None
      hint_move = None  # Store the hint move to highlight
-     hint_ai = MinimaxAI(current_player, depth=2)  # AI for hints
+     hint_ai = AlphaBetaAI(current_player, depth=HINT_MAX_DEPTH, use_bitboards=True)  # AI for hints
+     hint_worker = AIWorker(hint_ai)  # Hints are searched in the background
+     hint_search = None  # SearchHandle of the hint search for the current position
+     hint_cache = {}  # Position hash -> (best move found so far, depth it was found at, ranked candidate lines)
+     ai_worker = None  # Runs the AI player's searches in the background
+     ai_search = None  # SearchHandle of the AI's move being worked out
+     ponder_search = None  # SearchHandle of the AI thinking on the player's time
      hint_enabled = False  # Track if hints are currently shown
      move_count = 0  # Track move count for performance tuning
      last_board_hash = None  # For caching expensive calculations
@@ -305,6 +275,18 @@ def main_loop():
      while True:
         # Call the main menu function to start the game
         if game_mode is None:
+            # Abandon any search still running for the last game
+            ai_search = cancel_search(ai_search)
+            ponder_search = cancel_search(ponder_search)
+            hint_search = cancel_search(hint_search)
+            hint_cache.clear()
+            hint_enabled = False
+            hint_move = None
+            update_hint_button_text(hint_enabled)
+            if ai_worker is not None:
+                ai_worker.close()
+                ai_worker = None
+
             # Reset game state for a new game
             chess_board = board.Board()
             current_player = 'white'
@@ -328,6 +310,10 @@ def main_loop():
                 ai_player = AggressiveAI('black')
             elif game_mode == "pva_defensive":
                 ai_player = DefensiveAI('black')
+            if ai_player is not None and hasattr(ai_player, 'clock'):
+                ai_player.clock = chess_clock  # Timed games budget search time from the clock
+            if ai_player is not None:
+                ai_worker = AIWorker(ai_player)
             continue # Go back to the start of the loop to process the next frame
 
         # --- Event Handling ---
@@ -340,11 +326,51 @@ def main_loop():
                 game_over = True
                 winner = 'Black' if current_player == 'white' else 'White'
                 game_over_message = f"Time up! {winner} wins."
+                ai_search = cancel_search(ai_search)
+                hint_search = cancel_search(hint_search)
                 sound_manager.play_game_over()
 
         if not game_over:
+            # Work out a hint as soon as it's the player's turn, so it's ready when asked for
+            if not is_ai_turn and hint_search is None and promotion_dialog is None:
+                hint_search = start_hint_search(hint_worker, chess_board, current_player, hint_cache)
+            if hint_enabled:
+                # Show the best move so far; it updates as the search goes deeper
+                cached_hint = hint_cache.get(chess_board.position_hash)
+                hint_move = cached_hint[0] if cached_hint else None
+
             if is_ai_turn:
-                piece, move = ai_player.get_move(chess_board)
+                # Keep the window responsive while the AI thinks in the background
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        pygame.quit()
+                        quit()
+                    if surrender_button.handle_event(event):
+                        ai_search = cancel_search(ai_search)
+                        game_over = True
+                        game_over_message = "White surrendered. Black wins."
+                        break
+
+                piece, move = None, None
+                ai_info = None
+                if not game_over:
+                    if ai_search is None:
+                        if ponder_search is not None and ponder_search.position_hash == chess_board.position_hash:
+                            # Ponder hit: the AI has been searching this position already
+                            ai_worker.ponder_hit(ponder_search)
+                            ai_search = ponder_search
+                        else:
+                            cancel_search(ponder_search)
+                            ai_search = ai_worker.search(chess_board)
+                        ponder_search = None
+                    elif ai_search.done():
+                        ai_result = ai_search.result()
+                        ai_info = ai_search.info
+                        ai_search = None
+                        if ai_result:
+                            # The search ran on a copy, so find the piece on the real board
+                            searched_piece, move = ai_result
+                            piece = chess_board.get_piece_at_position(searched_piece.position)
                 if piece and move:
                     # Check if it's a capture before moving
                     is_capture = chess_board.get_piece_at_position(move) is not None
@@ -364,6 +390,7 @@ def main_loop():
                         chess_board.promotion_pending = None
                     
                     # Clear hints when AI moves
+                    hint_search = cancel_search(hint_search)
                     hint_enabled = False
                     hint_move = None
                     update_hint_button_text(hint_enabled)
@@ -390,6 +417,10 @@ def main_loop():
                             game_over_message = "Stalemate! It's a draw."
                     elif chess_board.is_in_check(current_player):
                         sound_manager.play_check()
+
+                    # Think on the player's time about the reply the AI expects
+                    if not game_over and getattr(ai_player, 'ponder', False) and ai_info and len(ai_info['pv']) > 1:
+                        ponder_search = ai_worker.ponder(chess_board, ai_info['pv'][1])
             else: # Human player's turn
                 for event in pygame.event.get():
                     if event.type == pygame.QUIT:
@@ -408,6 +439,7 @@ def main_loop():
                             legal_moves_for_selected_piece = []
                             
                             # Clear hints when promotion is completed
+                            hint_search = cancel_search(hint_search)
                             hint_enabled = False
                             hint_move = None
                             update_hint_button_text(hint_enabled)
@@ -434,6 +466,7 @@ def main_loop():
                         continue  # Skip regular event handling while dialog is open
 
                     if surrender_button.handle_event(event):
+                        hint_search = cancel_search(hint_search)
                         game_over = True
                         winner = 'Black' if current_player == 'white' else 'White'
                         game_over_message = f"{current_player.capitalize()} surrendered. {winner} wins."
@@ -441,20 +474,15 @@ def main_loop():
 
                     if hint_button.handle_event(event):
                         # Toggle hint system
-                        if hint_enabled and hint_move:
-                            # Turn off hints
+                        if hint_enabled:
+                            # Turn off hints; the search carries on in case they're wanted again
                             hint_enabled = False
                             hint_move = None
                         else:
-                            # Turn on hints - calculate best move
+                            # Turn on hints - whatever the background search has found so far
                             hint_enabled = True
-                            hint_ai.color = current_player  # Update AI color to current player
-                            hint_result = hint_ai.get_move(chess_board)
-                            if hint_result:
-                                hint_piece, hint_target = hint_result
-                                hint_move = (hint_piece.position, hint_target)
-                            else:
-                                hint_move = None
+                            cached_hint = hint_cache.get(chess_board.position_hash)
+                            hint_move = cached_hint[0] if cached_hint else None
                         update_hint_button_text(hint_enabled)
 
                     if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
@@ -491,6 +519,7 @@ def main_loop():
                                         legal_moves_for_selected_piece = []
                                         
                                         # Clear hints when move is made
+                                        hint_search = cancel_search(hint_search)
                                         hint_enabled = False
                                         hint_move = None
                                         update_hint_button_text(hint_enabled)
@@ -536,16 +565,24 @@ def main_loop():
                 elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                     game_mode = None # Return to main menu
 
+        if game_over:
+            # Nothing left to think about
+            ai_search = cancel_search(ai_search)
+            ponder_search = cancel_search(ponder_search)
+            hint_search = cancel_search(hint_search)
+
         # --- Drawing ---
         screen.fill(BACKGROUND_COLOR)
     
         # Draw the chess board onto its own surface, then blit it to the screen
-        chess_board.draw(surface=board_surface, selected_piece=selected_piece, legal_moves=legal_moves_for_selected_piece, hint_move=hint_move)
+        draw_board(board_surface, chess_board, selected_piece=selected_piece, legal_moves=legal_moves_for_selected_piece, hint_move=hint_move)
         screen.blit(board_surface, (0, board_y_offset))
 
         # Draw UI Panel
         is_in_check = chess_board.is_in_check(current_player)
-        draw_panel(screen, current_player, is_in_check, chess_board.captured_pieces['white'], chess_board.captured_pieces['black'], chess_clock)
+        cached_hint = hint_cache.get(chess_board.position_hash) if hint_enabled else None
+        hint_lines = cached_hint[2] if cached_hint else None
+        draw_panel(screen, current_player, is_in_check, chess_board.captured_pieces['white'], chess_board.captured_pieces['black'], chess_clock, hint_lines)
 
         # Draw promotion dialog if active
         if promotion_dialog:
@@ -574,14 +611,45 @@ def main_loop():
         # Set the frame rate of the game to 60 FPS
         clock.tick(60)
 
+def cancel_search(search):
+    """Stop a background search if there is one; returns None to clear the handle"""
+    if search is not None:
+        search.cancel()
+    return None
+
+def start_hint_search(worker, chess_board, color, hint_cache):
+    """Search the position for a hint in the background, caching the best moves after each iteration"""
+    key = chess_board.position_hash
+    cached_hint = hint_cache.get(key)
+    if cached_hint is not None and cached_hint[1] >= HINT_MAX_DEPTH:
+        return None  # Already searched as deep as hints go
+    start_depth = cached_hint[1] + 1 if cached_hint is not None else 1  # Carry on from the cached hint
+
+    def record(info):
+        cached = hint_cache.get(key)
+        if cached is None or info['depth'] >= cached[1]:  # Never replace a deeper hint
+            hint_cache[key] = (info['pv'][0], info['depth'], info['lines'])
+
+    return worker.search(chess_board, color, SearchRequest(depth=HINT_MAX_DEPTH, on_info=record, multi_pv=HINT_LINES,
+                                                           start_depth=start_depth, low_priority=True))
+
+def format_score(score):
+    """Score in pawns for the side to move, or moves to mate"""
+    if abs(score) >= MATE_THRESHOLD:
+        moves = int(MATE_SCORE - abs(score) + 1) // 2
+        return f"#{moves}" if score > 0 else f"#-{moves}"
+    return f"{score:+.2f}"
+
 def update_hint_button_text(hint_enabled):
     """Update hint button text based on current state"""
     global hint_button
     hint_button.text = "Hide Hint" if hint_enabled else "Show Hint"
 
-main_loop()
+if __name__ == "__main__":
+    main_loop()
+
+    # Exit the game engine
+    pygame.quit()
 
-# Exit the game engine
-pygame.quit()
 
 
@@ -0,0 +1,134 @@
+import argparse
+import json
+import sys
+import time
+
+from bitboard import BitBoard
+from board import Board, move_name
+
+# Perft: count the leaf nodes of the legal move tree to a fixed depth and
+# compare against published totals. Any bug in move generation shows up as a
+# wrong count, and the timings double as a move generation benchmark.
+#
+#   python perft.py                      # whole suite to depth 3
+#   python perft.py -p kiwipete -d 2 --divide
+#   python perft.py --fen "<fen>" -d 4 --json
+
+# name -> (FEN, node counts for depth 1, 2, 3, ...)
+POSITIONS = {
+    'start': ("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+              [20, 400, 8902, 197281]),
+    'kiwipete': ("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+                 [48, 2039, 97862, 4085603]),
+    'endgame': ("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",  # En passant and discovered checks
+                [14, 191, 2812, 43238]),
+    'promotions': ("r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+                   [6, 264, 9467, 422333]),
+    'middlegame': ("rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+                   [44, 1486, 62379, 2103487]),
+}
+
+PROMOTIONS = ['queen', 'rook', 'bishop', 'knight']
+
+def _expanded_moves(board):
+    """Legal moves for the side to move, with one entry per promotion choice"""
+    moves = []
+    for start, end in board.generate_legal_moves(board.turn):
+        if end[1] in (0, 7) and board.get_piece_at_position(start).kind == 'Pawn':
+            moves.extend((start, end, promotion) for promotion in PROMOTIONS)
+        else:
+            moves.append((start, end, 'queen'))
+    return moves
+
+def perft(board, depth):
+    """Number of leaf nodes of the legal move tree below a position"""
+    moves = _expanded_moves(board)
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for start, end, promotion in moves:
+        board.make_move(start, end, promotion)
+        nodes += perft(board, depth - 1)
+        board.unmake_move()
+    return nodes
+
+def divide(board, depth):
+    """Leaf counts below each root move, for tracking down a wrong total"""
+    counts = {}
+    for start, end, promotion in _expanded_moves(board):
+        is_promotion = end[1] in (0, 7) and board.get_piece_at_position(start).kind == 'Pawn'
+        board.make_move(start, end, promotion)
+        counts[move_name(start, end, promotion if is_promotion else None)] = perft(board, depth - 1) if depth > 1 else 1
+        board.unmake_move()
+    return counts
+
+def run_position(name, fen, depth, expected=(), use_bitboards=False):
+    """Perft a position at every depth up to depth, timing each one"""
+    board = Board.from_fen(fen)
+    if use_bitboards:
+        board = BitBoard.from_board(board)
+    result = {'name': name, 'fen': fen, 'backend': 'bitboard' if use_bitboards else 'board', 'depths': []}
+    for current in range(1, depth + 1):
+        start_time = time.perf_counter()
+        nodes = perft(board, current)
+        seconds = time.perf_counter() - start_time
+        entry = {'depth': current, 'nodes': nodes, 'seconds': round(seconds, 4),
+                 'nps': int(nodes / seconds) if seconds > 0 else None}
+        if current <= len(expected):
+            entry['expected'] = expected[current - 1]
+            entry['ok'] = nodes == expected[current - 1]
+        result['depths'].append(entry)
+    result['ok'] = all(entry.get('ok', True) for entry in result['depths'])
+    return result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Perft node counts and move generation timing")
+    parser.add_argument('-p', '--position', action='append', choices=sorted(POSITIONS),
+                        help="position from the built-in suite (repeatable, default: all)")
+    parser.add_argument('--fen', help="perft a custom position instead of the suite")
+    parser.add_argument('-d', '--depth', type=int, default=3, help="maximum depth (default 3)")
+    parser.add_argument('--divide', action='store_true', help="print node counts per root move")
+    parser.add_argument('--bitboard', action='store_true', help="run on the BitBoard backend")
+    parser.add_argument('--json', action='store_true', help="emit results as JSON")
+    args = parser.parse_args(argv)
+
+    if args.fen:
+        positions = [('fen', args.fen, [])]
+    else:
+        positions = [(name,) + POSITIONS[name] for name in (args.position or POSITIONS)]
+
+    if args.divide:
+        results = []
+        for name, fen, expected in positions:
+            board = Board.from_fen(fen)
+            if args.bitboard:
+                board = BitBoard.from_board(board)
+            counts = divide(board, args.depth)
+            results.append({'name': name, 'fen': fen, 'depth': args.depth, 'moves': counts,
+                            'nodes': sum(counts.values())})
+        if args.json:
+            print(json.dumps(results, indent=2))
+        else:
+            for result in results:
+                print(f"{result['name']} depth {result['depth']}")
+                for move, count in sorted(result['moves'].items()):
+                    print(f"  {move}: {count}")
+                print(f"  total: {result['nodes']}")
+        return 0
+
+    results = [run_position(name, fen, args.depth, expected, args.bitboard) for name, fen, expected in positions]
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for result in results:
+            print(f"{result['name']} ({result['backend']})")
+            for entry in result['depths']:
+                status = ''
+                if 'ok' in entry:
+                    status = 'ok' if entry['ok'] else f"FAIL, expected {entry['expected']}"
+                print(f"  depth {entry['depth']}: {entry['nodes']:>10} nodes {entry['seconds']:>9.3f}s "
+                      f"{entry['nps'] or 0:>9} nps  {status}")
+    return 0 if all(result['ok'] for result in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,11 @@
-import pygame
+# Pieces hold only their color and position. Move generation takes the board as
+# an argument, and castling rights and pawn start ranks are board-level rules, so
+# a piece carries no per-board state.
 
 # This is the base class for all chess pieces
 class ChessPiece:
+    __slots__ = ('color', 'position')
+
     def __init__(self, color, position):
         self.color = color  # 'white' or 'black'
         self.position = position  # tuple representing the piece's position on the board
@@ -11,72 +15,77 @@ class ChessPiece:
         self.position = new_position
         return True
 
-    # Method to draw a piece on the board
-    def draw(self, surface, image):
-        # Draw the piece's image on the given surface at its current position
-        x, y = self.position
-        surface.blit(image, ((x*50)+10, (y*50)+5))
+    def copy(self):
+        return self.__class__(self.color, self.position)
 
-    def copy(self, get_piece_at_position):
-        return self.__class__(self.color, self.position, get_piece_at_position)
+    # Squares along each direction up to and including the first occupied one
+    def _ray_attacks(self, board, directions):
+        attacks = []
+        x, y = self.position
+        for dx, dy in directions:
+            new_x, new_y = x + dx, y + dy
+            while 0 <= new_x < 8 and 0 <= new_y < 8:
+                attacks.append((new_x, new_y))
+                if board.get_piece_at_position((new_x, new_y)) is not None:
+                    break
+                new_x, new_y = new_x + dx, new_y + dy
+        return attacks
+
+    # Squares reachable by fixed offsets, whatever stands on them
+    def _offset_attacks(self, offsets):
+        x, y = self.position
+        return [(x + dx, y + dy) for dx, dy in offsets if 0 <= x + dx < 8 and 0 <= y + dy < 8]
 
 class Pawn(ChessPiece):
-    def __init__(self, color, position, get_piece_at_position):
-        super().__init__(color, position)
-        self.image = pygame.transform.scale(pygame.image.load(f"Icons/chess-pawn-solid{'-white' if color == 'white' else ''}.png"), (30, 40))
-        self.get_piece_at_position = get_piece_at_position
-        # if the pawn has moved then it can't move 2 spaces
-        self.first_move = True
-        
-    def draw(self, surface, image):
-        super().draw(surface, self.image)
+    kind = 'Pawn'
+    __slots__ = ()
 
-    def get_moves(self):
+    def get_moves(self, board):
         moves = []
         x, y = self.position
         
         if self.color == 'white':
             # Forward movement
-            if y < 7 and self.get_piece_at_position((x, y + 1)) is None:
+            if y < 7 and board.get_piece_at_position((x, y + 1)) is None:
                 moves.append((x, y + 1))
-                # First move
-                if self.first_move and y < 6 and self.get_piece_at_position((x, y + 2)) is None:
+                # Double push from the starting rank
+                if y == 1 and board.get_piece_at_position((x, y + 2)) is None:
                     moves.append((x, y + 2))
             
             # Diagonal captures
             if y < 7 and x > 0:
-                piece = self.get_piece_at_position((x - 1, y + 1))
+                piece = board.get_piece_at_position((x - 1, y + 1))
                 if piece is not None and piece.color == 'black':
                     moves.append((x - 1, y + 1))
             if y < 7 and x < 7:
-                piece = self.get_piece_at_position((x + 1, y + 1))
+                piece = board.get_piece_at_position((x + 1, y + 1))
                 if piece is not None and piece.color == 'black':
                     moves.append((x + 1, y + 1))
 
         elif self.color == 'black':
             # Forward movement
-            if y > 0 and self.get_piece_at_position((x, y - 1)) is None:
+            if y > 0 and board.get_piece_at_position((x, y - 1)) is None:
                 moves.append((x, y - 1))
-                # First move
-                if self.first_move and y > 1 and self.get_piece_at_position((x, y - 2)) is None:
+                # Double push from the starting rank
+                if y == 6 and board.get_piece_at_position((x, y - 2)) is None:
                     moves.append((x, y - 2))
 
             # Diagonal captures
             if y > 0 and x > 0:
-                piece = self.get_piece_at_position((x - 1, y - 1))
+                piece = board.get_piece_at_position((x - 1, y - 1))
                 if piece is not None and piece.color == 'white':
                     moves.append((x - 1, y - 1))
             if y > 0 and x < 7:
-                piece = self.get_piece_at_position((x + 1, y - 1))
+                piece = board.get_piece_at_position((x + 1, y - 1))
                 if piece is not None and piece.color == 'white':
                     moves.append((x + 1, y - 1))
                 
         return moves
     
-    def move(self, new_position):
-        super().move(new_position)
-        self.first_move = False
-        return True    
+    def get_attacks(self, board):
+        """Squares this pawn attacks (its diagonal captures, occupied or not)"""
+        direction = 1 if self.color == 'white' else -1
+        return self._offset_attacks([(-1, direction), (1, direction)])
 
     def can_promote(self):
         """Check if this pawn can be promoted (reached the opposite end)"""
@@ -87,32 +96,11 @@ class Pawn(ChessPiece):
             return True
         return False
 
-    def copy(self, get_piece_at_position):
-        pawn_copy = super().copy(get_piece_at_position)
-        pawn_copy.first_move = self.first_move
-        return pawn_copy
-
 class Rook(ChessPiece):
-    def __init__(self, color, position, get_piece_at_position):
-        super().__init__(color, position)
-        self.get_piece_at_position = get_piece_at_position
-        self.image = pygame.transform.scale(pygame.image.load(f"Icons/chess-rook-solid{'-white' if color == 'white' else ''}.png"), (30, 40))
-        self.has_moved = False
-
-    def draw(self, surface, image):
-        super().draw(surface, self.image)
+    kind = 'Rook'
+    __slots__ = ()
 
-    def move(self, new_position):
-        super().move(new_position)
-        self.has_moved = True
-        return True
-
-    def copy(self, get_piece_at_position):
-        rook_copy = super().copy(get_piece_at_position)
-        rook_copy.has_moved = self.has_moved
-        return rook_copy
-
-    def get_moves(self):
+    def get_moves(self, board):
         moves = []
         x, y = self.position
         
@@ -123,7 +111,7 @@ class Rook(ChessPiece):
                 new_x, new_y = x + dx * i, y + dy * i
                 
                 if 0 <= new_x < 8 and 0 <= new_y < 8:
-                    piece = self.get_piece_at_position((new_x, new_y))
+                    piece = board.get_piece_at_position((new_x, new_y))
                     if piece is None:
                         moves.append((new_x, new_y))
                     else:
@@ -134,16 +122,14 @@ class Rook(ChessPiece):
                     break # Out of bounds
         return moves
     
-class Bishop(ChessPiece):
-    def __init__(self, color, position, get_piece_at_position):
-        super().__init__(color, position)
-        self.image = pygame.transform.scale(pygame.image.load(f"Icons/chess-bishop-solid{'-white' if color == 'white' else ''}.png"), (30, 40))
-        self.get_piece_at_position = get_piece_at_position
+    def get_attacks(self, board):
+        return self._ray_attacks(board, [(0, 1), (0, -1), (1, 0), (-1, 0)])
 
-    def draw(self, surface, image):
-        super().draw(surface, self.image)
+class Bishop(ChessPiece):
+    kind = 'Bishop'
+    __slots__ = ()
 
-    def get_moves(self):
+    def get_moves(self, board):
         moves = []
         x, y = self.position
 
@@ -154,7 +140,7 @@ class Bishop(ChessPiece):
                 new_x, new_y = x + dx * i, y + dy * i
                 
                 if 0 <= new_x < 8 and 0 <= new_y < 8:
-                    piece = self.get_piece_at_position((new_x, new_y))
+                    piece = board.get_piece_at_position((new_x, new_y))
                     if piece is None:
                         moves.append((new_x, new_y))
                     else:
@@ -165,16 +151,14 @@ class Bishop(ChessPiece):
                     break # Out of bounds
         return moves
     
+    def get_attacks(self, board):
+        return self._ray_attacks(board, [(1, 1), (1, -1), (-1, 1), (-1, -1)])
+
 class Knight(ChessPiece):
-    def __init__(self, color, position, get_piece_at_position):
-        super().__init__(color, position)
-        self.image = pygame.transform.scale(pygame.image.load(f"Icons/chess-knight-solid{'-white' if color == 'white' else ''}.png"), (30, 40))
-        self.get_piece_at_position = get_piece_at_position
+    kind = 'Knight'
+    __slots__ = ()
 
-    def draw(self, surface, image):
-        super().draw(surface, self.image)
-    
-    def get_moves(self):
+    def get_moves(self, board):
         moves = []
         x, y = self.position
         
@@ -186,21 +170,19 @@ class Knight(ChessPiece):
         for move in possible_moves:
             new_x, new_y = move
             if 0 <= new_x < 8 and 0 <= new_y < 8:
-                piece = self.get_piece_at_position((new_x, new_y))
+                piece = board.get_piece_at_position((new_x, new_y))
                 if piece is None or piece.color != self.color:
                     moves.append(move)
         return moves
     
-class Queen(ChessPiece):
-    def __init__(self, color, position, get_piece_at_position):
-        super().__init__(color, position)
-        self.image = pygame.transform.scale(pygame.image.load(f"Icons/chess-queen-solid{'-white' if color == 'white' else ''}.png"), (30, 40))
-        self.get_piece_at_position = get_piece_at_position
+    def get_attacks(self, board):
+        return self._offset_attacks([(1, 2), (1, -2), (-1, 2), (-1, -2), (2, 1), (2, -1), (-2, 1), (-2, -1)])
 
-    def draw(self, surface, image):
-        super().draw(surface, self.image)
+class Queen(ChessPiece):
+    kind = 'Queen'
+    __slots__ = ()
 
-    def get_moves(self):
+    def get_moves(self, board):
         moves = []
         x, y = self.position
 
@@ -211,7 +193,7 @@ class Queen(ChessPiece):
                 new_x, new_y = x + dx * i, y + dy * i
                 
                 if 0 <= new_x < 8 and 0 <= new_y < 8:
-                    piece = self.get_piece_at_position((new_x, new_y))
+                    piece = board.get_piece_at_position((new_x, new_y))
                     if piece is None:
                         moves.append((new_x, new_y))
                     else:
@@ -222,27 +204,14 @@ class Queen(ChessPiece):
                     break # Out of bounds
         return moves
     
-class King(ChessPiece):
-    def __init__(self, color, position, get_piece_at_position):
-        super().__init__(color, position)
-        self.image = pygame.transform.scale(pygame.image.load(f"Icons/chess-king-solid{'-white' if color == 'white' else ''}.png"), (30, 40))
-        self.get_piece_at_position = get_piece_at_position
-        self.has_moved = False
-
-    def draw(self, surface, image):
-        super().draw(surface, self.image) 
+    def get_attacks(self, board):
+        return self._ray_attacks(board, [(0, 1), (0, -1), (1, 0), (-1, 0), (1, 1), (1, -1), (-1, 1), (-1, -1)])
 
-    def move(self, new_position):
-        super().move(new_position)
-        self.has_moved = True
-        return True
-
-    def copy(self, get_piece_at_position):
-        king_copy = super().copy(get_piece_at_position)
-        king_copy.has_moved = self.has_moved
-        return king_copy
+class King(ChessPiece):
+    kind = 'King'
+    __slots__ = ()
 
-    def get_moves(self):
+    def get_moves(self, board):
         moves = []
         x, y = self.position
         
@@ -254,7 +223,10 @@ class King(ChessPiece):
         for move in possible_moves:
             new_x, new_y = move
             if 0 <= new_x < 8 and 0 <= new_y < 8:
-                piece = self.get_piece_at_position((new_x, new_y))
+                piece = board.get_piece_at_position((new_x, new_y))
                 if piece is None or piece.color != self.color:
                     moves.append(move)
-        return moves
\ No newline at end of file
+        return moves
+
+    def get_attacks(self, board):
+        return self._offset_attacks([(1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1)])
@@ -0,0 +1,51 @@
+import threading
+import time
+
+from time_manager import TimeManager
+
+# Limits and controls for one AI search
+#
+# Every limit is optional and the search stops at whichever it reaches first.
+# Without a time limit the AI budgets from its chess clock, or searches to its
+# own depth when untimed. The first iteration always finishes unless the search
+# is stopped; a search stopped sooner returns the move it would have tried first.
+#
+#   request = SearchRequest(movetime=2.0, on_info=print)
+#   piece, end_pos = ai.get_move(board, request)   # request.stop() from another thread ends it early
+#
+# With multi_pv=N an alpha-beta AI ranks the N best root moves in one search,
+# each with its own score and principal variation.
+
+class SearchRequest:
+    def __init__(self, depth=None, nodes=None, movetime=None, deadline=None, on_info=None, infinite=False, multi_pv=1, start_depth=1, low_priority=False):
+        self.depth = depth  # Deepest iteration to run
+        self.nodes = nodes  # Most nodes to search
+        self.movetime = movetime  # Seconds to think
+        self.deadline = deadline  # time.monotonic() value to have a move by
+        self.infinite = infinite  # Ignore the clock and search until stopped, as when pondering
+        self.on_info = on_info  # Called after each finished iteration with its depth, score, pv, nodes and nps
+        self.multi_pv = multi_pv  # Best lines to rank at the root, reported in the info's 'lines'
+        self.start_depth = start_depth  # First iteration, to carry on from an earlier search of the position
+        self.low_priority = low_priority  # Pause now and then so the game and other searches come first
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        """Ask the search to stop as soon as it can"""
+        self._stop_event.set()
+
+    @property
+    def stopped(self):
+        return self._stop_event.is_set()
+
+    def time_manager(self, clock, color):
+        """TimeManager for the request's time limits, or from the clock if it sets none"""
+        if self.infinite:
+            return TimeManager()
+        limits = []
+        if self.movetime is not None:
+            limits.append(self.movetime)
+        if self.deadline is not None:
+            limits.append(max(0.0, self.deadline - time.monotonic()))
+        if not limits:
+            return TimeManager.for_clock(clock, color)
+        return TimeManager(min(limits), min(limits))
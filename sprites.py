@@ -0,0 +1,25 @@
+import pygame
+
+# Process-wide cache of piece images, keyed by (piece type, color, size).
+# Pieces carry no Surface; the GUI looks images up here when drawing.
+PIECE_IMAGE_SIZE = (30, 40)
+_images = {}
+
+def get_piece_image(kind, color, size=PIECE_IMAGE_SIZE):
+    """Return the image for a piece type and color, loading it from Icons/ on first use"""
+    key = (kind, color, size)
+    image = _images.get(key)
+    if image is None:
+        if size == PIECE_IMAGE_SIZE:
+            image = pygame.image.load(f"Icons/chess-{kind.lower()}-solid{'-white' if color == 'white' else ''}.png")
+        else:
+            image = get_piece_image(kind, color)
+        image = pygame.transform.scale(image, size)
+        _images[key] = image
+    return image
+
+def load_piece_images():
+    """Load every piece image up front so the first frame doesn't stall on disk I/O"""
+    for kind in ('Pawn', 'Knight', 'Bishop', 'Rook', 'Queen', 'King'):
+        for color in ('white', 'black'):
+            get_piece_image(kind, color)
@@ -0,0 +1,26 @@
+from ai import AlphaBetaAI
+from board import Board
+from transposition import EXACT, LOWER_BOUND, UPPER_BOUND
+
+FEN = "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3"
+DEPTH = 2
+
+def test_fail_high_against_stored_upper_bound_is_stored_as_lower_bound():
+    board = Board.from_fen(FEN)
+    value = AlphaBetaAI('white').negamax(board, DEPTH, -float('inf'), float('inf'), 0)
+
+    # An upper bound below the real score narrows beta, so the search fails high
+    # against it and its result is only a lower bound, even inside the caller's window
+    ai = AlphaBetaAI('white')
+    ai.tt.store(board.position_hash, DEPTH, UPPER_BOUND, value - 1, None)
+    result = ai.negamax(board, DEPTH, value - 3, value + 3, 0)
+
+    assert value - 1 <= result < value + 3
+    entry = ai.tt.probe(board.position_hash)
+    assert entry[2] == LOWER_BOUND
+
+def test_full_window_result_is_stored_as_exact():
+    board = Board.from_fen(FEN)
+    ai = AlphaBetaAI('white')
+    ai.negamax(board, DEPTH, -float('inf'), float('inf'), 0)
+    assert ai.tt.probe(board.position_hash)[2] == EXACT
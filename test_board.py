@@ -0,0 +1,28 @@
+import pytest
+
+from board import Board
+
+@pytest.mark.parametrize('fen', [
+    "rnbqkbnr/pppp1ppp/8/4p3/4P3/8/PPPP1PPP/RNBQKBNR w KQkq e6 0 2",
+    "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1",
+])
+def test_en_passant_square_behind_the_pawn_that_just_moved_is_accepted(fen):
+    assert Board.from_fen(fen).to_fen() == fen
+
+@pytest.mark.parametrize('fen', [
+    # Rank 3 with white to move: white can't have just made the double step
+    "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR w KQkq e3 0 1",
+    # Rank 6 with black to move
+    "rnbqkbnr/pppp1ppp/8/4p3/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e6 0 2",
+    # No black pawn in front of e6
+    "rnbqkbnr/pppp1ppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR w KQkq e6 0 2",
+    # A white pawn in front of e6
+    "rnbqkbnr/pppp1ppp/8/4P3/8/8/PPPP1PPP/RNBQKBNR w KQkq e6 0 2",
+    # The pawn's start square is occupied
+    "rnbqkbnr/ppppnppp/8/4p3/4P3/8/PPPP1PPP/RNBQKB1R w KQkq e6 0 2",
+    # Not a square on the board
+    "rnbqkbnr/pppp1ppp/8/4p3/4P3/8/PPPP1PPP/RNBQKBNR w KQkq i6 0 2",
+])
+def test_en_passant_square_that_no_double_step_explains_is_rejected(fen):
+    with pytest.raises(ValueError):
+        Board.from_fen(fen)
@@ -0,0 +1,46 @@
+import time
+
+# Move time budgets for the searching AIs
+#
+# The soft limit is what a move should normally take: a new iteration only
+# starts while there is a fair chance of finishing it inside the soft limit. The
+# hard limit is the most a move may ever take and stops the iteration in progress.
+MOVES_TO_GO = 30  # Moves the remaining time is assumed to cover
+NEXT_ITERATION_SHARE = 0.5  # Each iteration takes several times the last, so stop starting them past this share
+HARD_LIMIT_SHARE = 0.1  # Largest share of the remaining time one move may use
+SAFETY_MARGIN = 0.2  # Seconds held back for move animation and overhead
+
+class SearchTimeout(Exception):
+    """Raised inside a search once the hard limit has passed"""
+
+class TimeManager:
+    def __init__(self, soft_limit=None, hard_limit=None):
+        self.start_time = time.monotonic()
+        self.soft_limit = soft_limit  # Seconds, None for no limit
+        self.hard_limit = hard_limit
+
+    @classmethod
+    def for_clock(cls, clock, color):
+        """Budget for one move from the time a player has left on a ChessClock"""
+        remaining = clock.remaining_time(color) if clock is not None else None
+        if remaining is None:
+            return cls()
+        available = max(0.0, remaining - SAFETY_MARGIN)
+        soft_limit = available / MOVES_TO_GO
+        return cls(soft_limit, max(soft_limit, available * HARD_LIMIT_SHARE))
+
+    @property
+    def timed(self):
+        return self.soft_limit is not None
+
+    def elapsed(self):
+        return time.monotonic() - self.start_time
+
+    def can_start_iteration(self):
+        return self.soft_limit is None or self.elapsed() < self.soft_limit * NEXT_ITERATION_SHARE
+
+    def soft_expired(self):
+        return self.soft_limit is not None and self.elapsed() >= self.soft_limit
+
+    def hard_expired(self):
+        return self.hard_limit is not None and self.elapsed() >= self.hard_limit
@@ -0,0 +1,204 @@
+# Transposition table for the alpha-beta AIs
+#
+# Results are keyed by the board's Zobrist hash. The table has a fixed number
+# of buckets, worked out from a memory budget, and each bucket holds two
+# entries: one that keeps the deepest search of a position and one that is
+# always replaced by the latest store.
+
+import struct
+import sys
+from multiprocessing import shared_memory
+
+EXACT, LOWER_BOUND, UPPER_BOUND = 0, 1, 2
+
+TT_SIZE_MB = 16
+
+def _entry_bytes():
+    """Memory held by one stored entry: its list slot, tuple, key, score and best move"""
+    key, score, best_move = (1 << 64) - 1, 0.5, ((4, 1), (4, 3))
+    entry = (key, 0, EXACT, score, best_move, 0)  # Depth, flag and generation are small cached ints
+    return (struct.calcsize('P') + sys.getsizeof(entry) + sys.getsizeof(key) + sys.getsizeof(score)
+            + sys.getsizeof(best_move) + sum(sys.getsizeof(square) for square in best_move))
+
+ENTRY_BYTES = _entry_bytes()
+
+class TranspositionTable:
+    def __init__(self, size_mb=TT_SIZE_MB):
+        self.size_mb = size_mb
+        self.bucket_count = max(1, int(size_mb * 1024 * 1024) // (2 * ENTRY_BYTES))
+        self.clear()
+
+    def clear(self):
+        """Drop every entry and reset the counters"""
+        self._deep = [None] * self.bucket_count  # Depth-preferred slot per bucket
+        self._recent = [None] * self.bucket_count  # Always-replace slot per bucket
+        self.generation = 0
+        self.filled = 0
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+
+    def new_search(self):
+        """Age the stored entries so the next search can replace them in the deep slots"""
+        self.generation += 1
+
+    def probe(self, key):
+        """Entry (key, depth, flag, score, best_move, generation) for a position, or None"""
+        self.probes += 1
+        index = key % self.bucket_count
+        entry = self._deep[index]
+        if entry is None or entry[0] != key:
+            entry = self._recent[index]
+            if entry is None or entry[0] != key:
+                return None
+        self.hits += 1
+        return entry
+
+    def store(self, key, depth, flag, score, best_move):
+        """Record a search result, keeping the deeper one in the depth-preferred slot"""
+        self.stores += 1
+        index = key % self.bucket_count
+        entry = (key, depth, flag, score, best_move, self.generation)
+        deep = self._deep[index]
+        if deep is None or deep[0] == key or depth >= deep[1] or deep[5] != self.generation:
+            if deep is None:
+                self.filled += 1
+            self._deep[index] = entry
+        else:
+            if self._recent[index] is None:
+                self.filled += 1
+            self._recent[index] = entry
+
+    def stats(self):
+        """Size, fill and hit counters of the table"""
+        return {
+            'size_mb': self.size_mb,
+            'capacity': 2 * self.bucket_count,
+            'entries': self.filled,
+            'fill': self.filled / (2 * self.bucket_count),
+            'probes': self.probes,
+            'hits': self.hits,
+            'hit_rate': self.hits / self.probes if self.probes else 0.0,
+            'stores': self.stores,
+        }
+
+# Shared-memory table for searches running in several processes
+#
+# The table lives in a multiprocessing.shared_memory block laid out as one
+# header word (the search generation) followed by buckets of two entries, each
+# three little-endian unsigned 64-bit words:
+#
+#   check = key ^ score ^ data
+#   score = the score's IEEE double bits
+#   data  = depth (bits 0-7) | flag (8-9) | generation (10-17)
+#           | has move (18) | move start square (19-24) | move end square (25-30)
+#           | in use (31)
+#
+# Writers take no lock. A probe recomputes key ^ score ^ data from the check
+# word, so an entry torn by two processes writing at once doesn't match any key
+# and reads as a miss.
+
+SHARED_ENTRY = struct.Struct('<QQQ')
+SHARED_HEADER = struct.Struct('<Q')
+SHARED_BUCKET_BYTES = 2 * SHARED_ENTRY.size
+IN_USE_BIT = 1 << 31
+HAS_MOVE_BIT = 1 << 18
+
+def _double_bits(value):
+    return struct.unpack('<Q', struct.pack('<d', value))[0]
+
+def _bits_double(bits):
+    return struct.unpack('<d', struct.pack('<Q', bits))[0]
+
+class SharedTranspositionTable:
+    def __init__(self, size_mb=TT_SIZE_MB):
+        self.size_mb = size_mb
+        self.bucket_count = max(1, int(size_mb * 1024 * 1024) // SHARED_BUCKET_BYTES)
+        self._memory = shared_memory.SharedMemory(create=True, size=SHARED_HEADER.size + self.bucket_count * SHARED_BUCKET_BYTES)
+        self._owner = True  # The creating process unlinks the block on close
+        self.clear()
+
+    # Pickles as the block's name, so a worker process attaches to the same table
+    def __getstate__(self):
+        return {'name': self._memory.name, 'size_mb': self.size_mb, 'bucket_count': self.bucket_count}
+
+    def __setstate__(self, state):
+        self.size_mb = state['size_mb']
+        self.bucket_count = state['bucket_count']
+        self._memory = shared_memory.SharedMemory(name=state['name'])
+        self._owner = False
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+
+    def close(self):
+        """Detach from the shared block, freeing it if this process created it"""
+        if self._memory.buf is None:
+            return
+        self._memory.close()
+        if self._owner:
+            self._memory.unlink()
+
+    def clear(self):
+        """Drop every entry and reset the counters"""
+        self._memory.buf[:] = bytes(self._memory.size)
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+
+    @property
+    def generation(self):
+        return SHARED_HEADER.unpack_from(self._memory.buf, 0)[0]
+
+    def new_search(self):
+        """Age the stored entries so the next search can replace them in the deep slots"""
+        SHARED_HEADER.pack_into(self._memory.buf, 0, (self.generation + 1) & 0xFF)
+
+    def probe(self, key):
+        """Entry (key, depth, flag, score, best_move, generation) for a position, or None"""
+        self.probes += 1
+        buf = self._memory.buf
+        base = SHARED_HEADER.size + (key % self.bucket_count) * SHARED_BUCKET_BYTES
+        for offset in (base, base + SHARED_ENTRY.size):
+            check, score, data = SHARED_ENTRY.unpack_from(buf, offset)
+            if data and check ^ score ^ data == key:
+                self.hits += 1
+                best_move = None
+                if data & HAS_MOVE_BIT:
+                    start, end = (data >> 19) & 63, (data >> 25) & 63
+                    best_move = ((start % 8, start // 8), (end % 8, end // 8))
+                return (key, data & 0xFF, (data >> 8) & 3, _bits_double(score), best_move, (data >> 10) & 0xFF)
+        return None
+
+    def store(self, key, depth, flag, score, best_move):
+        """Record a search result, keeping the deeper one in the depth-preferred slot"""
+        self.stores += 1
+        buf = self._memory.buf
+        generation = SHARED_HEADER.unpack_from(buf, 0)[0]
+        data = IN_USE_BIT | max(0, depth) & 0xFF | flag << 8 | generation << 10
+        if best_move is not None:
+            (start_x, start_y), (end_x, end_y) = best_move
+            data |= HAS_MOVE_BIT | (start_y * 8 + start_x) << 19 | (end_y * 8 + end_x) << 25
+        score_bits = _double_bits(score)
+
+        offset = SHARED_HEADER.size + (key % self.bucket_count) * SHARED_BUCKET_BYTES
+        deep_check, deep_score, deep_data = SHARED_ENTRY.unpack_from(buf, offset)
+        if (deep_data and deep_check ^ deep_score ^ deep_data != key
+                and depth < deep_data & 0xFF and (deep_data >> 10) & 0xFF == generation):
+            offset += SHARED_ENTRY.size  # Keep the deeper entry, use the always-replace slot
+        SHARED_ENTRY.pack_into(buf, offset, key ^ score_bits ^ data, score_bits, data)
+
+    def stats(self):
+        """Size, fill and hit counters of the table (counters are this process's only)"""
+        filled = sum(1 for _, _, data in SHARED_ENTRY.iter_unpack(self._memory.buf[SHARED_HEADER.size:]) if data)
+        capacity = 2 * self.bucket_count
+        return {
+            'size_mb': self.size_mb,
+            'capacity': capacity,
+            'entries': filled,
+            'fill': filled / capacity,
+            'probes': self.probes,
+            'hits': self.hits,
+            'hit_rate': self.hits / self.probes if self.probes else 0.0,
+            'stores': self.stores,
+        }
@@ -0,0 +1,28 @@
+# Zobrist keys shared by board.Board and bitboard.BitBoard
+#
+# Keys come from a fixed seed, so a position hashes to the same value in every
+# process and on both backends.
+import random
+
+_random = random.Random(0x5A0B21)
+
+def _key():
+    return _random.getrandbits(64)
+
+COLORS = ('white', 'black')
+KINDS = ('Pawn', 'Knight', 'Bishop', 'Rook', 'Queen', 'King')
+
+# PIECE_KEYS[(kind, color)][y * 8 + x]
+PIECE_KEYS = {(kind, color): [_key() for _ in range(64)] for color in COLORS for kind in KINDS}
+BLACK_TO_MOVE_KEY = _key()
+EP_FILE_KEYS = [_key() for _ in range(8)]
+
+# Castling rights bitmask: white kingside 1, white queenside 2, black kingside 4, black queenside 8
+_RIGHT_KEYS = [_key() for _ in range(4)]
+CASTLING_KEYS = []
+for mask in range(16):
+    key = 0
+    for bit in range(4):
+        if mask & (1 << bit):
+            key ^= _RIGHT_KEYS[bit]
+    CASTLING_KEYS.append(key)